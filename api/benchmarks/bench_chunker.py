@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ingest.chunk_text (linear) vs. the previous quadratic chunker.
+
+Extracts the largest bundled PDF once (or --pdf), optionally repeats its
+pages to simulate a bigger manual, times both chunkers and checks that they
+produce the same chunk boundaries, text and start pages.
+
+Usage (from api/):
+    python benchmarks/bench_chunker.py [--pdf cms-guide-model.pdf] [--repeat 1] [--rounds 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge_base"))
+
+import ingest
+
+
+def legacy_chunk_text(pages: list[dict], filename: str) -> list[dict]:
+    """ingest.chunk_text before the linear rewrite (kept for comparison)."""
+    # Concatenate all pages with page markers
+    full_text = ""
+    page_boundaries = []  # (char_offset, page_num)
+    for p in pages:
+        page_boundaries.append((len(full_text), p["page"]))
+        full_text += p["text"] + "\n\n"
+
+    chunks = []
+    start = 0
+    chunk_id = 0
+
+    while start < len(full_text):
+        end = start + ingest.CHARS_PER_CHUNK
+
+        # Try to break at sentence boundary
+        if end < len(full_text):
+            # Look for sentence end within last 200 chars of chunk
+            search_start = max(end - 200, start)
+            last_period = full_text.rfind(". ", search_start, end + 100)
+            if last_period > search_start:
+                end = last_period + 1
+
+        chunk_text_content = full_text[start:end].strip()
+        if not chunk_text_content or len(chunk_text_content) < 50:
+            start = end - ingest.CHARS_OVERLAP
+            continue
+
+        # Determine which page(s) this chunk spans
+        chunk_pages = []
+        for offset, page_num in page_boundaries:
+            if offset <= start < offset + len(full_text):
+                if start <= offset <= end or offset <= start:
+                    chunk_pages.append(page_num)
+        # Simplify: find the page for the start position
+        page_num = 1
+        for offset, pn in page_boundaries:
+            if offset <= start:
+                page_num = pn
+
+        meta = ingest.PDF_METADATA.get(filename, {"source": "Unknown", "title": filename, "year": "Unknown"})
+        chunks.append({
+            "id": f"{filename}::chunk_{chunk_id}",
+            "text": chunk_text_content,
+            "metadata": {
+                "source": meta["source"],
+                "title": meta["title"],
+                "year": meta["year"],
+                "filename": filename,
+                "page": page_num,
+                "chunk_id": chunk_id,
+            },
+        })
+        chunk_id += 1
+        start = end - ingest.CHARS_OVERLAP
+
+    return chunks
+
+
+def best_of(fn, rounds: int) -> tuple[float, list[dict]]:
+    best, result = float("inf"), None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="file in knowledge_base/pdfs (default: the largest one)")
+    parser.add_argument("--repeat", type=int, default=1, help="repeat the pages N times")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    pdfs = [f for f in os.listdir(ingest.PDF_DIR) if f.endswith(".pdf")]
+    filename = args.pdf or max(pdfs, key=lambda f: os.path.getsize(os.path.join(ingest.PDF_DIR, f)))
+    pages = ingest.extract_text_from_pdf(os.path.join(ingest.PDF_DIR, filename))
+    pages = [
+        {"page": r * len(pages) + p["page"], "text": p["text"]}
+        for r in range(args.repeat) for p in pages
+    ]
+    chars = sum(len(p["text"]) for p in pages)
+    print(f"📄 {filename}: {len(pages)} pages, {chars:,} chars")
+
+    legacy_s, legacy = best_of(lambda: legacy_chunk_text(pages, filename), args.rounds)
+    linear_s, linear = best_of(lambda: ingest.chunk_text(pages, filename), args.rounds)
+    print(f"  legacy chunker: {legacy_s * 1000:9.1f} ms  ({len(legacy)} chunks)")
+    print(f"  linear chunker: {linear_s * 1000:9.1f} ms  ({len(linear)} chunks)  {legacy_s / linear_s:.1f}x faster")
+
+    same = len(legacy) == len(linear) and all(
+        a["id"] == b["id"] and a["text"] == b["text"] and a["metadata"]["page"] == b["metadata"]["page"]
+        for a, b in zip(legacy, linear)
+    )
+    multi_page = sum(1 for c in linear if c["metadata"]["page_end"] != c["metadata"]["page"])
+    print(f"  {'✅' if same else '❌'} identical chunk ids, text and start pages")
+    print(f"  {multi_page} chunks span more than one page (recorded in page_end)")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/events/stats/dashboard from materialized counters vs. a
+grouped scan of behavioral_events vs. the original one-query-per-figure
+implementation.
+
+Fills a scratch SQLite database with synthetic behavioral events, growing
+it through each --sizes step, and times all three at every size (events are
+bulk-inserted with Core, so the counters are rebuilt before timing). Also
+checks that they return the same payload (top-patient ties may be ordered
+differently, so only their counts are compared). Then checks that the
+counters stay exact when committed events are edited after a commit has
+expired them (as the background report workers do), and finally measures
+what the counter-maintaining flush listener adds to committing single
+reports.
+
+Usage (from api/):
+    python benchmarks/bench_dashboard.py [--sizes 10000,100000,1000000] [--patients 60] [--rounds 3]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INSERT_BATCH = 20000
+
+
+def legacy_dashboard(db) -> dict:
+    """event_router.simulation_dashboard before event_stats (kept for comparison)."""
+    from sqlalchemy import func
+    from models import BehavioralEvent, Patient
+
+    total_events = db.query(BehavioralEvent).count()
+    total_patients = db.query(Patient).count()
+    patients_with_events = db.query(BehavioralEvent.patient_id).distinct().count()
+
+    type_dist = db.query(
+        BehavioralEvent.event_type, func.count(BehavioralEvent.id)
+    ).group_by(BehavioralEvent.event_type).all()
+    event_types = {(t.value if hasattr(t, 'value') else str(t)): c for t, c in type_dist}
+
+    sev_dist = db.query(
+        BehavioralEvent.severity, func.count(BehavioralEvent.id)
+    ).group_by(BehavioralEvent.severity).all()
+    severities = {(s.value if hasattr(s, 'value') else str(s)): c for s, c in sev_dist}
+
+    shift_dist = db.query(
+        BehavioralEvent.shift, func.count(BehavioralEvent.id)
+    ).group_by(BehavioralEvent.shift).all()
+    shifts = {(s.value if hasattr(s, 'value') else str(s)): c for s, c in shift_dist}
+
+    events_with_protocols = db.query(BehavioralEvent).filter(
+        BehavioralEvent.protocol_matched.isnot(None),
+        BehavioralEvent.protocol_matched != '[]',
+        BehavioralEvent.protocol_matched != 'null',
+    ).count()
+    protocol_coverage = round(events_with_protocols / total_events * 100, 1) if total_events else 0
+
+    events_with_intervention = db.query(BehavioralEvent).filter(
+        BehavioralEvent.intervention_description.isnot(None),
+    ).count()
+    intervention_rate = round(events_with_intervention / total_events * 100, 1) if total_events else 0
+
+    resolved_events = db.query(BehavioralEvent).filter(BehavioralEvent.resolved == True).count()
+    resolution_rate = round(resolved_events / total_events * 100, 1) if total_events else 0
+
+    top_patients = db.query(
+        Patient.name, func.count(BehavioralEvent.id).label("count")
+    ).join(BehavioralEvent).group_by(Patient.name).order_by(
+        func.count(BehavioralEvent.id).desc()
+    ).limit(10).all()
+
+    return {
+        "total_events": total_events,
+        "total_patients": total_patients,
+        "patients_with_events": patients_with_events,
+        "event_types": event_types,
+        "severities": severities,
+        "shifts": shifts,
+        "protocol_coverage_pct": protocol_coverage,
+        "intervention_rate_pct": intervention_rate,
+        "resolution_rate_pct": resolution_rate,
+        "top_patients": [{"name": n, "events": c} for n, c in top_patients],
+    }
+
+
+def seed(db, patients: int) -> tuple[list[int], int]:
+    from models import Facility, Patient, CareStaff, StaffRole
+
+    facility = Facility(name="Benchmark Memory Care")
+    db.add(facility)
+    db.flush()
+    staff = CareStaff(facility_id=facility.id, name="Benchmark CNA", role=StaffRole.CNA)
+    db.add(staff)
+    db.add_all(Patient(facility_id=facility.id, name=f"Resident {i:03d}") for i in range(patients))
+    db.commit()
+    return [p.id for p in db.query(Patient.id).all()], staff.id
+
+
+def insert_events(engine, count: int, patient_ids: list[int], reporter_id: int, rng: random.Random):
+    from models import BehavioralEvent, EventType, Severity, ShiftType
+
+    protocol = [{"source": "NICE", "section": "1.7", "steps": ["Redirect calmly"]}]
+    start = datetime(2025, 1, 1)
+    weights = [rng.random() for _ in patient_ids]
+    table = BehavioralEvent.__table__
+    with engine.begin() as conn:
+        for offset in range(0, count, INSERT_BATCH):
+            rows = []
+            for _ in range(min(INSERT_BATCH, count - offset)):
+                event_at = start + timedelta(minutes=rng.randrange(525600))
+                rows.append({
+                    "patient_id": rng.choices(patient_ids, weights)[0],
+                    "reporter_id": reporter_id,
+                    "shift": rng.choice(list(ShiftType) + [None]),
+                    "event_type": rng.choice(list(EventType)),
+                    "severity": rng.choice(list(Severity) + [None]),
+                    "description": "Synthetic benchmark event",
+                    "protocol_matched": rng.choice([protocol, protocol, [], None]),
+                    "intervention_description": rng.choice(["Redirected to lounge", None]),
+                    "resolved": rng.random() < 0.6,
+                    "event_at": event_at,
+                    "created_at": event_at,
+                    "updated_at": event_at,
+                })
+            conn.execute(table.insert(), rows)
+
+
+def same_payload(a: dict, b: dict) -> bool:
+    def without_top(d: dict) -> list:
+        return [(k, list(v.items()) if isinstance(v, dict) else v) for k, v in d.items() if k != "top_patients"]
+
+    def top_counts(d: dict) -> list[int]:
+        return [p["events"] for p in d["top_patients"]]
+
+    return without_top(a) == without_top(b) and top_counts(a) == top_counts(b)
+
+
+def report_commit_ms(db, patient_ids: list[int], reporter_id: int, count: int) -> float:
+    """Mean time to add and commit one event through the ORM."""
+    from models import BehavioralEvent, EventType
+
+    started = time.perf_counter()
+    for i in range(count):
+        db.add(BehavioralEvent(
+            patient_id=patient_ids[i % len(patient_ids)], reporter_id=reporter_id,
+            event_type=EventType.AGITATION, description="Synthetic benchmark event",
+        ))
+        db.commit()
+    return (time.perf_counter() - started) * 1000 / count
+
+
+def update_after_commit(db, count: int, rng: random.Random) -> bool:
+    """Edit `count` committed, expired events one commit at a time; True if counters still match a scan."""
+    import event_stats
+    from models import BehavioralEvent, EventType, Severity, ShiftType
+
+    events = db.query(BehavioralEvent).order_by(BehavioralEvent.id.desc()).limit(count).all()
+    db.commit()  # expires every loaded event, like report_queue's stage commits
+    for event in events:
+        event.event_type = rng.choice(list(EventType))
+        event.severity = rng.choice(list(Severity))
+        event.shift = rng.choice(list(ShiftType))
+        event.resolved = rng.random() < 0.5
+        db.commit()
+    return event_stats.dashboard(db) == event_stats.dashboard_from_events(db)
+
+
+def timed(fn, db, rounds: int) -> tuple[float, dict]:
+    samples, result = [], None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn(db)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated event counts")
+    parser.add_argument("--patients", type=int, default=60)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--commits", type=int, default=200, help="single-report commits for the listener timing")
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+
+    workdir = tempfile.TemporaryDirectory(prefix="dashboard-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir.name, 'bench.db')}"
+    from sqlalchemy import event
+    from models import Base, engine, SessionLocal
+    import event_stats
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(args.seed)
+    db = SessionLocal()
+    patient_ids, reporter_id = seed(db, args.patients)
+
+    print(f"{'events':>10} {'legacy ms':>10} {'scan ms':>8} {'counters ms':>12} {'rebuild ms':>11}  same")
+    stored = 0
+    for size in sizes:
+        insert_events(engine, size - stored, patient_ids, reporter_id, rng)
+        stored = size
+        started = time.perf_counter()
+        event_stats.rebuild(db)
+        db.commit()
+        rebuild_ms = (time.perf_counter() - started) * 1000
+        legacy_ms, legacy = timed(legacy_dashboard, db, args.rounds)
+        scan_ms, scanned = timed(event_stats.dashboard_from_events, db, args.rounds)
+        counters_ms, materialized = timed(event_stats.dashboard, db, args.rounds)
+        same = same_payload(legacy, scanned) and same_payload(legacy, materialized)
+        print(f"{size:>10} {legacy_ms:>10.1f} {scan_ms:>8.1f} {counters_ms:>12.2f} {rebuild_ms:>11.1f}  "
+              f"{'✅' if same else '❌'}")
+
+    exact = update_after_commit(db, args.commits, rng)
+    print(f"\n{'✅' if exact else '❌'} Counters {'match' if exact else 'differ from'} a scan after "
+          f"{args.commits} updates to expired events")
+
+    with_listener = report_commit_ms(db, patient_ids, reporter_id, args.commits)
+    event.remove(SessionLocal, "after_flush", event_stats._maintain_counters)
+    without_listener = report_commit_ms(db, patient_ids, reporter_id, args.commits)
+    print(f"📝 Commit one report: {with_listener:.2f} ms with counters, {without_listener:.2f} ms without")
+    db.close()
+    engine.dispose()
+    workdir.cleanup()
+    if not exact:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
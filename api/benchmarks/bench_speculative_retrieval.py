@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential vs. speculative retrieval in the event report pipeline.
+
+Runs event_pipeline.run_pipeline over a fixed set of caregiver reports in both
+modes and prints end-to-end latency. By default it calls the configured LLM
+provider; pass --simulated-llm-ms to replace the parse/summarize calls with
+fixed delays so the comparison runs offline and isolates retrieval overlap.
+
+Usage (from api/):
+    python benchmarks/bench_speculative_retrieval.py [--rounds 5] [--simulated-llm-ms 800] [--cold-table]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_service
+import rag_service
+import event_pipeline
+
+REPORTS = [
+    "Margaret is getting really agitated again, it's that time of day. Walking around, asking for family.",
+    "Robert tried to get up on his own at 14:00. Caught him before he fell. Pretty unsteady.",
+    "Dorothy got aggressive during care. Hit my arm when I tried to help with bathroom.",
+    "Resident refused her morning medication twice and pushed the cup away.",
+    "Found Mr. Chen near the exit door trying to leave, says he needs to go to work.",
+    "She has been awake most of the night calling out and pulling at her blanket.",
+    "He seems confused about where he is and didn't recognize his room this afternoon.",
+    "Resident had a good day, ate well, no behavioral issues noted.",
+]
+
+
+def install_simulated_llm(delay_ms: float):
+    """Replace LLM calls with fixed delays and a keyword-based parse."""
+    delay = delay_ms / 1000
+
+    async def parse_event(text: str, priority=None) -> dict:
+        await asyncio.sleep(delay)
+        lowered = text.lower()
+        event_type = "Other"
+        for et, keywords in rag_service.EVENT_TYPE_KEYWORDS.items():
+            if any(kw in lowered for kw in keywords):
+                event_type = et.title() if et != "sleep_disturbance" else "Sleep_Disturbance"
+                break
+        return {"event_type": event_type, "severity": "Low" if event_type == "Other" else "Medium",
+                "location": "Unknown", "trigger": "Unknown", "summary": text[:200]}
+
+    async def summarize_protocols_for_event(event_type, description, protocols, priority=None):
+        await asyncio.sleep(delay)
+        return [{"source": p["source"], "page": p["page"], "steps": ["Step."]} for p in protocols]
+
+    llm_service.parse_event = parse_event
+    llm_service.summarize_protocols_for_event = summarize_protocols_for_event
+
+
+async def run_mode(speculative: bool, rounds: int, cold_table: bool) -> list[float]:
+    latencies = []
+    for _ in range(rounds):
+        for report in REPORTS:
+            if cold_table:
+                rag_service._event_type_table = {}
+            start = time.perf_counter()
+            await event_pipeline.run_pipeline(report, speculative=speculative)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(name: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"{name:<12} n={len(latencies):<4} mean={statistics.mean(latencies):8.1f}ms "
+          f"p50={statistics.median(latencies):8.1f}ms p95={p95:8.1f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Sequential vs. speculative retrieval benchmark")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes over the report set per mode")
+    parser.add_argument("--simulated-llm-ms", type=float, default=None,
+                        help="Replace LLM calls with this fixed delay (offline mode)")
+    parser.add_argument("--cold-table", action="store_true",
+                        help="Clear the precomputed event-type table before every report")
+    args = parser.parse_args()
+
+    if args.simulated_llm_ms is not None:
+        install_simulated_llm(args.simulated_llm_ms)
+
+    # Load the collection and embedding model outside the timed runs
+    rag_service.warm_event_type_table()
+
+    print(f"=== Speculative retrieval benchmark ({len(REPORTS)} reports x {args.rounds} rounds) ===")
+    sequential = await run_mode(False, args.rounds, args.cold_table)
+    speculative = await run_mode(True, args.rounds, args.cold_table)
+    summarize("sequential", sequential)
+    summarize("speculative", speculative)
+    saved = statistics.mean(sequential) - statistics.mean(speculative)
+    print(f"\nMean latency saved: {saved:.1f}ms ({saved / statistics.mean(sequential) * 100:.1f}%)")
+    print(f"Speculation: {event_pipeline.speculation_stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Chroma HNSW query vs. exact NumPy scan (vector_index.py).
+
+Embeds a fixed query set once, then times only the search step of each
+backend, with and without a source filter, and reports recall@k of Chroma
+against the exact NumPy results (which are the ground truth for cosine).
+
+Usage (from api/):
+    python benchmarks/bench_vector_index.py [--k 5] [--rounds 20] [--no-mmap]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rag_service
+from vector_index import VectorIndex
+
+QUERIES = list(rag_service.EVENT_TYPE_QUERIES.values()) + [
+    "patient is agitated and refusing medication",
+    "resident found on the floor after trying to stand without help",
+    "how to redirect a resident who keeps trying to leave the building",
+    "caregiver was hit during bathing, how to de-escalate",
+    "resident awake all night calling out",
+    "staff training requirements for dementia care in nursing homes",
+    "antipsychotic medication use and gradual dose reduction",
+    "assessment of pain in people with advanced dementia",
+]
+SOURCE_FILTER = "NICE"
+
+
+def time_ms(fn, rounds: int) -> list[float]:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def describe(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"mean {statistics.mean(samples):7.3f} ms   p50 {statistics.median(samples):7.3f} ms   p95 {p95:7.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=20, help="timed passes over the query set")
+    parser.add_argument("--no-mmap", action="store_true", help="read the saved matrix into memory instead")
+    args = parser.parse_args()
+
+    collection = rag_service._get_collection()
+    start = time.perf_counter()
+    index = VectorIndex.from_collection(collection)
+    print(f"📦 Built NumPy index: {len(index)} chunks x {index.matrix.shape[1]} dims "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    tmp_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bench_vector_index")
+    index.save(tmp_dir)
+    start = time.perf_counter()
+    index = VectorIndex.load(tmp_dir, mmap=not args.no_mmap)
+    print(f"📂 Loaded saved index ({'in memory' if args.no_mmap else 'memory-mapped'}) "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    embeddings = rag_service.embed_texts(QUERIES)
+
+    for label, source in (("no filter", None), (f"source={SOURCE_FILTER}", SOURCE_FILTER)):
+        where = {"source": source} if source else None
+
+        def chroma_search():
+            return [
+                collection.query(query_embeddings=[e.tolist()], n_results=args.k, where=where)["ids"][0]
+                for e in embeddings
+            ]
+
+        def numpy_search():
+            return [[index.ids[i] for i, _ in hits] for hits in index.search(embeddings, args.k, source)]
+
+        def numpy_search_one_by_one():
+            return [[index.ids[i] for i, _ in index.search(e, args.k, source)[0]] for e in embeddings]
+
+        chroma_ids = chroma_search()
+        exact_ids = numpy_search()
+        recall = statistics.mean(
+            len(set(c) & set(x)) / len(x) for c, x in zip(chroma_ids, exact_ids) if x
+        )
+
+        per_query = len(QUERIES)
+        print(f"=== {label}, k={args.k}, {per_query} queries ===")
+        print(f"  Chroma (per query)        {describe([s / per_query for s in time_ms(chroma_search, args.rounds)])}")
+        print(f"  NumPy  (per query)        {describe([s / per_query for s in time_ms(numpy_search_one_by_one, args.rounds)])}")
+        print(f"  NumPy  (batched, per q.)  {describe([s / per_query for s in time_ms(numpy_search, args.rounds)])}")
+        print(f"  Chroma recall@{args.k} vs exact: {recall:.3f}\n")
+
+    for name in os.listdir(tmp_dir):
+        os.remove(os.path.join(tmp_dir, name))
+    os.rmdir(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Check: handoff generation issues the same number of queries however many
+events and patients the shift has.
+
+Builds a scratch database through init_db(), then repeatedly adds Night
+events, each for a new resident, and calls POST /api/handoffs/generate
+through the FastAPI TestClient while counting the SELECTs it issues. A
+per-event patient lookup would add one query per resident; the joined event
+query keeps the count flat. The LLM summary is replaced with a canned one
+(as --simulated-llm-ms does in bench_speculative_retrieval.py), so only
+database work is measured.
+
+Usage (from api/):
+    python benchmarks/check_handoff_queries.py [--sizes 1,10,50,100]
+
+Exits 1 if the query count changes with the number of events.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FACILITY_ID = 1
+REQUEST = {"facility_id": FACILITY_ID, "from_shift": "Night", "to_shift": "Day"}
+
+
+def add_night_events(count: int, offset: int):
+    """`count` Night events, each for a resident of its own."""
+    from models import SessionLocal, Patient, BehavioralEvent, EventType, Severity, ShiftType
+
+    db = SessionLocal()
+    start = datetime(2025, 3, 1, 23, 0)
+    try:
+        for i in range(offset, offset + count):
+            patient = Patient(facility_id=FACILITY_ID, name=f"Night Resident {i:03d}")
+            db.add(patient)
+            db.flush()
+            db.add(BehavioralEvent(
+                patient_id=patient.id,
+                reporter_id=1,
+                shift=ShiftType.NIGHT,
+                event_type=EventType.SUNDOWNING,
+                severity=Severity.MEDIUM,
+                description="Synthetic handoff-check event",
+                event_at=start + timedelta(minutes=i),
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,10,50,100",
+                        help="comma-separated Night event counts (handoffs read at most 100)")
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+
+    workdir = tempfile.TemporaryDirectory(prefix="handoff-queries-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir.name, 'handoffs.db')}"
+    os.environ["WARMUP"] = "0"
+
+    from sqlalchemy import event
+    from fastapi.testclient import TestClient
+    import main as app_main  # runs init_db() + seed_demo_data()
+    import llm_service
+    from models import engine
+
+    summarized = []
+
+    async def canned_summary(events: list[dict]) -> dict:
+        summarized.append(events)
+        return {"events_summary": [], "pending_items": []}
+
+    llm_service.summarize_events = canned_summary
+
+    selects = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    client = TestClient(app_main.app)
+    counts = []
+    stored = 0
+    print(f"{'events':>7} {'selects':>8} {'ms':>7}")
+    for size in sizes:
+        add_night_events(size - stored, stored)
+        stored = size
+        selects.clear()
+        summarized.clear()
+        started = time.perf_counter()
+        response = client.post("/api/handoffs/generate", json=REQUEST)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.status_code != 201:
+            print(f"❌ {size} events: HTTP {response.status_code} {response.text[:200]}")
+            sys.exit(1)
+        named = summarized and all(e["patient_name"].startswith("Night Resident") for e in summarized[0])
+        if not named or len(summarized[0]) != min(size, 100):
+            print(f"❌ {size} events: summary input is missing events or patient names")
+            sys.exit(1)
+        counts.append(len(selects))
+        print(f"{size:>7} {len(selects):>8} {elapsed_ms:>7.1f}")
+
+    engine.dispose()
+    workdir.cleanup()
+    if len(set(counts)) > 1:
+        print(f"\n❌ Query count grows with the shift's events: {counts}")
+        sys.exit(1)
+    print(f"\n✅ Handoff generation issues {counts[0]} SELECTs at every size")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Check: no event endpoint full-scans a table that grows with event history.
+
+Builds a scratch database through init_db(), fills it with synthetic events,
+calls each endpoint through the FastAPI TestClient while recording every
+SELECT it issues, and runs EXPLAIN QUERY PLAN on each one. A plan step
+"SCAN <table>" without an index on behavioral_events, event_stat_buckets,
+shift_handoffs or report_jobs fails the check. Scans of the per-resident and
+per-staff tables (patients, patient_event_counts, ...) are allowed: they
+grow with the facility, not with its history.
+
+Seeded events avoid the Night shift, so handoff generation for Night runs
+its event query and returns without calling the LLM.
+
+Usage (from api/):
+    python benchmarks/check_query_plans.py [--events 5000] [--drop-indexes] [--verbose]
+
+--drop-indexes removes the ix_* indexes first, to show what the check catches.
+Exits 1 if any endpoint full-scans a history table.
+"""
+
+import os
+import re
+import sys
+import random
+import argparse
+import tempfile
+from urllib.parse import quote
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HISTORY_TABLES = {"behavioral_events", "event_stat_buckets", "shift_handoffs", "report_jobs"}
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+ENDPOINTS = [
+    ("GET", "/api/events?limit=50", None),
+    ("GET", "/api/events?patient_id=1", None),
+    ("GET", "/api/events?shift=Day", None),
+    ("GET", "/api/events?event_date=2025-03-01", None),
+    ("GET", "/api/events?patient_id=2&event_date=2025-03-01", None),
+    ("GET", "/api/events?patient_id=2&shift=Evening", None),
+    ("GET", "/api/events?limit=20", None),
+    ("GET", "/api/events?limit=20&cursor={next}", None),  # {next}: previous response's X-Next-Cursor
+    ("GET", "/api/events?patient_id=1&limit=20&cursor={next}", None),
+    ("GET", "/api/events/1", None),
+    ("POST", "/api/handoffs/generate", {"facility_id": 1, "from_shift": "Night", "to_shift": "Day"}),
+    ("GET", "/api/events/stats/dashboard", None),
+    ("GET", "/api/handoffs?limit=1", None),
+    ("GET", "/api/handoffs?facility_id=1&limit=1", None),
+    ("GET", "/api/patients?facility_id=1", None),
+    ("GET", "/api/patients?facility_id=1&limit=2", None),
+    ("GET", "/api/patients?facility_id=1&limit=2&cursor={next}", None),
+]
+
+
+def seed_events(count: int, rng: random.Random):
+    from models import SessionLocal, BehavioralEvent, EventType, Severity, ShiftType
+
+    db = SessionLocal()
+    start = datetime(2025, 1, 1)
+    try:
+        for i in range(count):
+            db.add(BehavioralEvent(
+                patient_id=rng.choice([1, 2, 3]),
+                reporter_id=1,
+                shift=rng.choice([ShiftType.DAY, ShiftType.EVENING]),
+                event_type=rng.choice(list(EventType)),
+                severity=rng.choice(list(Severity)),
+                description="Synthetic plan-check event",
+                event_at=start + timedelta(minutes=rng.randrange(180 * 24 * 60)),
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def drop_indexes(engine):
+    with engine.begin() as conn:
+        names = [row[0] for row in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'"
+        )]
+        for name in names:
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--drop-indexes", action="store_true", help="drop the ix_* indexes before checking")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(prefix="query-plans-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir.name, 'plans.db')}"
+    os.environ["WARMUP"] = "0"
+
+    from sqlalchemy import event
+    from fastapi.testclient import TestClient
+    import main as app_main  # runs init_db() + seed_demo_data()
+    from models import engine
+
+    seed_events(args.events, random.Random(11))
+    if args.drop_indexes:
+        drop_indexes(engine)
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    client = TestClient(app_main.app)
+    failures = 0
+    next_cursor = ""
+    for method, path, body in ENDPOINTS:
+        path = path.format(next=quote(next_cursor))
+        statements.clear()
+        response = client.request(method, path, json=body)
+        next_cursor = response.headers.get("X-Next-Cursor", "")
+        captured = list(statements)
+        scans = []
+        plans = []
+        with engine.connect() as conn:
+            for statement, parameters in captured:
+                plan = [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+                plans.append((statement, plan))
+                for step in plan:
+                    match = FULL_SCAN.match(step)
+                    if match and match.group(1) in HISTORY_TABLES:
+                        scans.append(step)
+
+        status = "❌" if scans or response.status_code >= 500 else "✅"
+        print(f"{status} {method:<4} {path[:60]:<60} {response.status_code}  {len(captured)} queries"
+              + (f"  full scans: {', '.join(sorted(set(scans)))}" if scans else ""))
+        if scans or response.status_code >= 500:
+            failures += 1
+        if args.verbose or scans:
+            for statement, plan in plans:
+                print(f"      {' '.join(statement.split())[:110]}")
+                for step in plan:
+                    print(f"        → {step}")
+
+    engine.dispose()
+    workdir.cleanup()
+    if failures:
+        print(f"\n❌ {failures} endpoint(s) full-scan a history table")
+        sys.exit(1)
+    print(f"\n✅ No endpoint full-scans {', '.join(sorted(HISTORY_TABLES))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Evaluate the local event classifier against LLM-labelled events in the app DB.
+
+First runs the rule stage over RULE_CASES, hand-written reports (negations,
+near misses, look-alike wording) with the answer the rules must give: a
+label, or None to defer to the LLM. Then holds out every Nth labelled event,
+fits the nearest-neighbour stage on the rest, and reports how many held-out
+reports each stage answers, its agreement with the stored (LLM) labels and
+its latency.
+
+Usage (from api/, with DB_PATH pointing at a populated memowell.db):
+    python benchmarks/eval_event_classifier.py [--holdout-every 5] [--cases-only]
+
+Exits 1 if a rule case fails.
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import event_classifier
+import rag_service
+from models import SessionLocal, BehavioralEvent
+
+# (report, (event_type, severity) the rules must answer or None to defer to the LLM, is_urgent)
+RULE_CASES = [
+    ("She did not fall today, no issues.", ("Other", "Low"), False),
+    ("No falls this shift.", None, False),
+    ("Good day overall, no behavioral issues, did not hit anyone.", ("Other", "Low"), False),
+    ("Missing breakfast again, she refuses to eat.", None, False),
+    ("Fell in hallway, minor bruise.", None, True),
+    ("Almost fell near the bathroom but staff caught her.", None, False),
+    ("Good day, had a seizure at noon.", None, True),
+    ("Mrs. J is missing from the unit, last seen at the front door.", None, True),
+    ("Resident fell in the bathroom and was found on the floor with a bruise on her arm.", ("Fall", "High"), True),
+    ("He was yelling and pacing in the lounge, very agitated after dinner.", ("Agitation", "Medium"), False),
+    ("Not aggressive this morning, but hit the aide during bathing and kicked the chair.",
+     ("Aggression", "High"), True),
+    ("Fell asleep in the lounge after lunch and slept through the activity.", None, False),
+    ("Hit the call button twice overnight, then hit the call light again at 5am.", None, False),
+]
+
+
+def check_rule_cases() -> int:
+    """Run RULE_CASES through the rule stage; returns the number of failures."""
+    failures = 0
+    print(f"=== Rule stage: {len(RULE_CASES)} cases ===")
+    for text, expected, urgent in RULE_CASES:
+        parsed, confidence = event_classifier.classify_rules(text)
+        answered = parsed is not None and confidence >= event_classifier.CLASSIFIER_RULE_THRESHOLD
+        got = (parsed["event_type"], parsed["severity"]) if answered else None
+        got_urgent = event_classifier.is_urgent(text)
+        ok = got == expected and got_urgent == urgent
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {str(got or 'LLM'):<24} urgent={got_urgent!s:<5} {text[:60]}")
+        if not ok:
+            print(f"      expected {expected or 'LLM'}, urgent={urgent}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local event classifier")
+    parser.add_argument("--holdout-every", type=int, default=5, help="Hold out every Nth event for testing")
+    parser.add_argument("--limit", type=int, default=5000, help="Maximum labelled events to load")
+    parser.add_argument("--cases-only", action="store_true", help="Only run the rule cases")
+    args = parser.parse_args()
+
+    failures = check_rule_cases()
+    if failures:
+        print(f"\n❌ {failures} rule case(s) failed")
+        sys.exit(1)
+    if args.cases_only:
+        return
+    print()
+
+    db = SessionLocal()
+    try:
+        rows = db.query(BehavioralEvent).order_by(BehavioralEvent.id).limit(args.limit).all()
+        rows = [(e.description, e.event_type.value, e.severity.value if e.severity else "Medium")
+                for e in rows if e.description]
+    finally:
+        db.close()
+
+    test = rows[::args.holdout_every]
+    train = [r for i, r in enumerate(rows) if i % args.holdout_every]
+    print(f"=== Event classifier evaluation: {len(train)} train / {len(test)} test ===")
+    if not train or not test:
+        print("Not enough labelled events to evaluate.")
+        return
+
+    start = time.perf_counter()
+    knn = event_classifier.KnnClassifier().fit(
+        rag_service.embed_texts([r[0] for r in train]),
+        [r[1] for r in train],
+        [r[2] for r in train],
+    )
+    print(f"kNN index built in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    answered = Counter()
+    type_correct = Counter()
+    severity_correct = Counter()
+    latency = Counter()
+    for text, label_type, label_severity in test:
+        start = time.perf_counter()
+        parsed, confidence = event_classifier.classify_rules(text)
+        stage = "rules"
+        if parsed is None or confidence < event_classifier.CLASSIFIER_RULE_THRESHOLD:
+            event_type, severity, confidence = knn.predict(rag_service.embed_texts([text])[0])
+            parsed = {"event_type": event_type, "severity": severity} if event_type else None
+            stage = "knn"
+            if parsed is None or confidence < event_classifier.CLASSIFIER_KNN_THRESHOLD:
+                stage = "llm_fallback"
+        latency[stage] += (time.perf_counter() - start) * 1000
+        answered[stage] += 1
+        if stage != "llm_fallback":
+            type_correct[stage] += parsed["event_type"] == label_type
+            severity_correct[stage] += parsed["severity"] == label_severity
+
+    print(f"\n{'stage':<14}{'answered':>10}{'share':>9}{'type acc':>10}{'sev acc':>9}{'mean ms':>9}")
+    for stage in ("rules", "knn", "llm_fallback"):
+        n = answered[stage]
+        if not n:
+            continue
+        type_acc = f"{type_correct[stage] / n:.1%}" if stage != "llm_fallback" else "-"
+        sev_acc = f"{severity_correct[stage] / n:.1%}" if stage != "llm_fallback" else "-"
+        print(f"{stage:<14}{n:>10}{n / len(test):>9.1%}{type_acc:>10}{sev_acc:>9}{latency[stage] / n:>9.2f}")
+
+    local = answered["rules"] + answered["knn"]
+    if local:
+        print(f"\nLLM calls avoided: {local}/{len(test)} ({local / len(test):.1%}), "
+              f"event_type agreement on those: {(type_correct['rules'] + type_correct['knn']) / local:.1%}")
+
+
+if __name__ == "__main__":
+    main()
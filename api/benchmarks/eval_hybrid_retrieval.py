@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Evaluate: vector vs. hybrid (BM25 + vector, RRF) retrieval precision.
+
+Each query below comes with the word stems a relevant chunk must contain.
+A result counts as relevant if its text mentions any of them; precision@k is
+averaged over the query set for both modes, along with the chunk characters
+that would be sent to summarize_protocols.
+
+Usage (from api/):
+    python benchmarks/eval_hybrid_retrieval.py [--k 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rag_service
+
+# (query, stems a relevant chunk must mention)
+LABELLED_QUERIES = [
+    ("haloperidol Lewy body dementia", ["haloperidol", "lewy"]),
+    ("antipsychotic gradual dose reduction nursing home", ["antipsychotic", "dose reduction"]),
+    ("F-tag unnecessary psychotropic drugs", ["psychotropic"]),
+    ("cholinesterase inhibitors donepezil rivastigmine", ["donepezil", "rivastigmine", "cholinesterase"]),
+    ("memantine moderate to severe Alzheimer's", ["memantine"]),
+    ("resident fell and hit head, post-fall assessment", ["fall"]),
+    ("exit-seeking wandering elopement door alarm", ["wander", "elope", "exit"]),
+    ("sundowning late afternoon agitation", ["sundown", "late afternoon"]),
+    ("pain assessment in advanced dementia PAINAD", ["pain"]),
+    ("delirium screening acute confusion", ["delirium"]),
+    ("sleep hygiene insomnia melatonin", ["sleep", "insomnia", "melatonin"]),
+    ("refuses bathing, person-centered approach to resistance to care", ["bath", "resist", "refus"]),
+]
+
+
+def precision(results: list[dict], stems: list[str]) -> float:
+    if not results:
+        return 0.0
+    relevant = sum(1 for r in results if any(s in r["text"].lower() for s in stems))
+    return relevant / len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    rag_service._get_lexical_index()  # build/load outside the timings
+    rag_service.embed_queries([q for q, _ in LABELLED_QUERIES])
+
+    print(f"{'query':<58} {'vector':>7} {'hybrid':>7}")
+    totals = {"vector": [], "hybrid": []}
+    chars = {"vector": 0, "hybrid": 0}
+    latency = {"vector": [], "hybrid": []}
+    for query, stems in LABELLED_QUERIES:
+        row = []
+        for mode in ("vector", "hybrid"):
+            start = time.perf_counter()
+            results = rag_service.search_protocols(query, n_results=args.k, mode=mode)
+            latency[mode].append((time.perf_counter() - start) * 1000)
+            p = precision(results, stems)
+            totals[mode].append(p)
+            chars[mode] += sum(len(r["text"]) for r in results)
+            row.append(p)
+        print(f"{query[:58]:<58} {row[0]:>7.2f} {row[1]:>7.2f}")
+
+    print()
+    for mode in ("vector", "hybrid"):
+        print(f"{'📊 ' + mode:<10} precision@{args.k} {statistics.mean(totals[mode]):.3f}   "
+              f"mean latency {statistics.mean(latency[mode]):.2f} ms   chunk chars {chars[mode]}")
+
+    # The smallest hybrid k that matches vector precision at --k
+    target = statistics.mean(totals["vector"])
+    for k in range(1, args.k + 1):
+        p = statistics.mean(
+            precision(rag_service.search_protocols(q, n_results=k, mode="hybrid"), stems)
+            for q, stems in LABELLED_QUERIES
+        )
+        if p >= target:
+            print(f"✅ hybrid with n_results={k} matches vector precision@{args.k} ({p:.3f} >= {target:.3f})")
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Query Embedding Cache — skip the embedding model for repeated RAG queries.
+
+Query text → float32 vector, held in a bounded in-process LRU and, optionally,
+a SQLite table that every worker on the host reads and writes, so a query
+embedded once by any process is a lookup everywhere afterwards. Keys hash the
+embedding model name with the exact text, so a model change never serves
+stale vectors. Free-text queries rarely repeat exactly, so the table is
+bounded too: least-recently-used rows beyond RAG_EMBED_CACHE_MAX_ROWS are
+evicted, as llm_cache does.
+
+Set via environment variables:
+  RAG_EMBED_CACHE_SIZE=2048                    (in-memory entries, 0 = disabled)
+  RAG_EMBED_CACHE_PATH=./embedding_cache.db    (empty = memory only)
+  RAG_EMBED_CACHE_MAX_ROWS=20000               (SQLite rows kept)
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RAG_EMBED_CACHE_SIZE = int(os.getenv("RAG_EMBED_CACHE_SIZE", "2048"))
+RAG_EMBED_CACHE_PATH = os.getenv("RAG_EMBED_CACHE_PATH", "./embedding_cache.db")
+RAG_EMBED_CACHE_MAX_ROWS = int(os.getenv("RAG_EMBED_CACHE_MAX_ROWS", "20000"))
+
+# Check the size bound every N written rows rather than on every insert
+_EVICT_EVERY = 100
+
+
+def make_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU of query embeddings with an optional shared SQLite backing store."""
+
+    def __init__(self, model: str, max_entries: int = RAG_EMBED_CACHE_SIZE, path: str | None = RAG_EMBED_CACHE_PATH,
+                 max_rows: int = RAG_EMBED_CACHE_MAX_ROWS):
+        self.model = model
+        self.max_entries = max_entries
+        self.path = path or None
+        self.max_rows = max_rows
+        self.writes = 0
+        self.evictions = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.embedded = 0
+        self.embed_seconds = 0.0
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.path:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " vector BLOB NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(query_embeddings)")}
+            if "accessed_at" not in columns:  # tables created before eviction
+                self._conn.execute("ALTER TABLE query_embeddings ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_query_embeddings_accessed ON query_embeddings (accessed_at)"
+            )
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, texts: list[str]) -> list[np.ndarray | None]:
+        """Cached vectors for `texts` (None where missing)."""
+        keys = [make_key(self.model, t) for t in texts]
+        found: list[np.ndarray | None] = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+            missing = [i for i, v in enumerate(found) if v is None]
+            if missing and self._conn is not None:
+                wanted = {keys[i] for i in missing}
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM query_embeddings WHERE key IN ({','.join('?' * len(wanted))})",
+                    tuple(wanted),
+                ).fetchall()
+                stored = {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+                if stored:
+                    self._conn.execute(
+                        f"UPDATE query_embeddings SET accessed_at = ? WHERE key IN ({','.join('?' * len(stored))})",
+                        (time.time(), *stored),
+                    )
+                for i in missing:
+                    vector = stored.get(keys[i])
+                    if vector is not None:
+                        found[i] = vector
+                        self._remember(keys[i], vector)
+                        self.disk_hits += 1
+            hits = sum(v is not None for v in found)
+            self.hits += hits
+            self.misses += len(texts) - hits
+        return found
+
+    def put_many(self, texts: list[str], vectors: np.ndarray):
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = make_key(self.model, text)
+                vector = np.ascontiguousarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                now = time.time()
+                rows.append((key, vector.tobytes(), now, now))
+            if self._conn is not None and rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vector, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                before = self.writes
+                self.writes += len(rows)
+                if self.writes // _EVICT_EVERY != before // _EVICT_EVERY:
+                    self._evict()
+
+    def _evict(self):
+        """Drop least-recently-used rows above max_rows."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()
+        overflow = count - self.max_rows
+        if overflow > 0:
+            cur = self._conn.execute(
+                "DELETE FROM query_embeddings WHERE key IN ("
+                " SELECT key FROM query_embeddings ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += cur.rowcount
+
+    def record_embedding(self, count: int, seconds: float):
+        self.embedded += count
+        self.embed_seconds += seconds
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        disk_entries = None
+        if self._conn is not None:
+            with self._lock:
+                (disk_entries,) = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()
+        return {
+            "enabled": True,
+            "path": self.path,
+            "memory_entries": len(self._memory),
+            "disk_entries": disk_entries,
+            "max_disk_entries": self.max_rows if self._conn is not None else None,
+            "disk_evictions": self.evictions,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "embedded": self.embedded,
+            "mean_embed_ms": round(self.embed_seconds / self.embedded * 1000, 3) if self.embedded else 0.0,
+        }
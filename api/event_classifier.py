@@ -0,0 +1,367 @@
+"""
+Event Classifier — local fast path in front of LLM event parsing.
+
+Two stages, tried in order:
+  1. Keyword/regex rules for reports that name the behavior outright
+     ("fell", "hit my arm", "trying to leave", "sundowning").
+  2. Nearest-neighbour vote over embeddings of previously labelled
+     BehavioralEvent rows, which catches template-style reports that
+     have been seen before in different words.
+
+A stage only answers when its confidence clears its threshold; anything
+else returns None and the caller falls back to llm_service.parse_event.
+A keyword preceded by a negation in the same clause ("did not fall", "no
+falls") does not count, and the rules only answer on two or more distinct
+cues for one behavior that clearly outnumber any other behavior's cues.
+Severity rules only escalate from Medium, never lower it.
+
+The kNN index is rebuilt in a background thread once it is older than the
+refresh interval; reports keep using the previous index meanwhile.
+
+Set via environment variables:
+  EVENT_CLASSIFIER=0                 (default: 0, set 1 to try the local stages first)
+  CLASSIFIER_RULE_THRESHOLD=0.85
+  CLASSIFIER_KNN_THRESHOLD=0.8
+  CLASSIFIER_KNN_MIN_SIMILARITY=0.85 (cosine similarity of the nearest example)
+  CLASSIFIER_KNN_K=5
+  CLASSIFIER_KNN_MAX_EXAMPLES=5000   (most recent labelled events indexed)
+  CLASSIFIER_KNN_REFRESH_SECONDS=600
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EVENT_CLASSIFIER = os.getenv("EVENT_CLASSIFIER", "0") not in ("0", "false", "False")
+CLASSIFIER_RULE_THRESHOLD = float(os.getenv("CLASSIFIER_RULE_THRESHOLD", "0.85"))
+CLASSIFIER_KNN_THRESHOLD = float(os.getenv("CLASSIFIER_KNN_THRESHOLD", "0.8"))
+CLASSIFIER_KNN_MIN_SIMILARITY = float(os.getenv("CLASSIFIER_KNN_MIN_SIMILARITY", "0.85"))
+CLASSIFIER_KNN_K = int(os.getenv("CLASSIFIER_KNN_K", "5"))
+CLASSIFIER_KNN_MAX_EXAMPLES = int(os.getenv("CLASSIFIER_KNN_MAX_EXAMPLES", "5000"))
+CLASSIFIER_KNN_REFRESH_SECONDS = int(os.getenv("CLASSIFIER_KNN_REFRESH_SECONDS", "600"))
+
+# Look-alikes that are not the behavior: "fell asleep", "hit the call button/light"
+FALL_WORDS = r"(?:fell|fall|falls|fallen)(?!\s+asleep)"
+HIT_WORDS = r"(?:hit|hits|hitting)(?!\s+the\s+(?:call\s+)?(?:button|light))"
+
+# Checked in priority order: when several types match, the earlier one wins
+EVENT_TYPE_RULES = [
+    ("Aggression", r"\b(" + HIT_WORDS + r"|struck|strike|punch\w*|kick\w*|bit|bite|biting|slapp?\w*|scratch\w*|"
+                   r"shov\w*|push(ed)? (me|staff)|aggressi\w*|combative|threw)\b"),
+    ("Fall", r"\b(" + FALL_WORDS + r"|found (him|her|them) on the floor|on the floor|slipped|tripped)\b"),
+    ("Wandering", r"\b(wander\w*|elop\w*|exit[- ]seeking|trying to (leave|get out)|near the exit|"
+                  r"at the (front )?door)\b"),
+    ("Sundowning", r"\b(sundown\w*|that time of day|late afternoon)\b"),
+    ("Refusal", r"\b(refus\w*|won'?t (take|eat|drink)|declin\w*|spit (it )?out|pushed (the|her|his) (cup|tray|pills?) away)\b"),
+    ("Sleep_Disturbance", r"\b(awake (all|most of the) night|up all night|insomnia|can'?t sleep|not sleeping|"
+                          r"won'?t (go to )?sleep)\b"),
+    ("Confusion", r"\b(confus\w*|disorient\w*|didn'?t recogni[sz]e|doesn'?t recogni[sz]e|hallucinat\w*|"
+                  r"doesn'?t know where)\b"),
+    ("Agitation", r"\b(agitat\w*|restless\w*|pacing|yell\w*|scream\w*|shout\w*|upset|anxious)\b"),
+]
+
+# A cue preceded by one of these within the same clause does not count
+NEGATION_RULE = re.compile(
+    r"\b(no|not|never|without|denies|denied|none|nobody|didn'?t|doesn'?t|wasn'?t|isn'?t|hasn'?t|hadn'?t|"
+    r"won'?t|can'?t|cannot)\b", re.I,
+)
+NEGATION_WINDOW = 3  # words before the cue
+CLAUSE_BREAK = re.compile(r"[.,;:!?]|\b(?:but|however|then)\b", re.I)
+
+POSITIVE_RULE = re.compile(
+    r"\b(good day|doing (well|good|great|fine)|no (behavioral )?issues?|no concerns?|no incidents?|"
+    r"uneventful|all good|normal day)\b", re.I,
+)
+
+# Escalations from the Medium default, checked in order. "almost fell" and
+# "nearly hit" are near misses, so those words guard severity cues too.
+SEVERITY_RULES = [
+    ("Critical", r"\b(unresponsive|not breathing|seizure|chest pain|head injury|bleeding heavily|911|"
+                 r"left the building|(is|was|went|gone|been|reported) missing|"
+                 r"missing from (the |his |her |their )?(unit|floor|building|facility|room)|"
+                 r"can(no|')?t (be found|find (him|her|them)|locate (him|her|them)))\b"),
+    ("High", r"\b(injur\w*|bleeding|bruis\w*|struck|" + HIT_WORDS + "|" + FALL_WORDS +
+             r"|on the floor|eloped|outside)\b"),
+]
+NEAR_MISS_RULE = re.compile(r"\b(almost|nearly)\b", re.I)
+
+LOCATION_RULE = re.compile(
+    r"\b(?:in|at|near|by|outside) (?:the |his |her |their )?"
+    r"(dining room|hallway|hall|bathroom|bedroom|room \w+|lounge|common area|activity room|garden|courtyard|"
+    r"nurses'? station|front door|exit|elevator|shower|living room|tv room)\b",
+    re.I,
+)
+
+TRIGGER_RULE = re.compile(r"\b(?:triggered by|because of|due to|during|after) ([^.,;!?]{3,80})", re.I)
+
+_compiled_type_rules = [(t, re.compile(p, re.I)) for t, p in EVENT_TYPE_RULES]
+_compiled_severity_rules = [(s, re.compile(p, re.I)) for s, p in SEVERITY_RULES]
+
+_stats = defaultdict(lambda: {"count": 0, "latency_ms": 0.0})
+
+
+def _summary(text: str) -> str:
+    first = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    return first[:200]
+
+
+def _location(text: str) -> str:
+    match = LOCATION_RULE.search(text)
+    return match.group(1).title() if match else "Unknown"
+
+
+def _trigger(text: str) -> str:
+    match = TRIGGER_RULE.search(text)
+    return match.group(1).strip() if match else "Unknown"
+
+
+def _negated(text: str, start: int, guard: re.Pattern = NEGATION_RULE) -> bool:
+    """True if a guard word appears in the few words before `start`, within its clause."""
+    clause = CLAUSE_BREAK.split(text[:start])[-1]
+    words = clause.split()[-NEGATION_WINDOW:]
+    return any(guard.fullmatch(w.strip("\"'()")) for w in words)
+
+
+def _cues(rule: re.Pattern, text: str, near_miss: bool = False) -> set[str]:
+    """Distinct phrases `rule` matches in `text`, ignoring negated (and optionally near-miss) ones."""
+    found = set()
+    for match in rule.finditer(text):
+        if _negated(text, match.start()):
+            continue
+        if near_miss and _negated(text, match.start(), NEAR_MISS_RULE):
+            continue
+        found.add(match.group(0).lower())
+    return found
+
+
+def _severity(text: str) -> str:
+    for severity, rule in _compiled_severity_rules:
+        if _cues(rule, text, near_miss=True):
+            return severity
+    return "Medium"
+
+
+def is_urgent(text: str) -> bool:
+    """True if the wording suggests a High/Critical event (used for LLM priority)."""
+    return _severity(text) in ("High", "Critical")
+
+
+def _parsed(text: str, event_type: str, severity: str) -> dict:
+    return {
+        "event_type": event_type,
+        "severity": severity,
+        "location": _location(text),
+        "trigger": _trigger(text),
+        "summary": _summary(text),
+    }
+
+
+def classify_rules(text: str) -> tuple[dict | None, float]:
+    """Keyword/regex stage. Returns (parsed, confidence)."""
+    matches = []
+    for event_type, rule in _compiled_type_rules:
+        found = _cues(rule, text)
+        if found:
+            matches.append((event_type, len(found)))
+
+    severity = _severity(text)
+    if not matches:
+        # An all-clear report, unless it also carries an escalation cue
+        if severity == "Medium" and POSITIVE_RULE.search(text):
+            return _parsed(text, "Other", "Low"), 0.9
+        return None, 0.0
+
+    # One cue alone is not enough to skip the LLM, and competing behaviors
+    # must be clearly outnumbered
+    event_type, hits = matches[0]
+    runner_up = max((h for _, h in matches[1:]), default=0)
+    confidence = 0.9 if hits >= 2 and hits >= 2 * runner_up else 0.5
+    return _parsed(text, event_type, severity), confidence
+
+
+class KnnClassifier:
+    """Cosine nearest-neighbour vote over embedded, labelled reports."""
+
+    def __init__(self, k: int = CLASSIFIER_KNN_K, min_similarity: float = CLASSIFIER_KNN_MIN_SIMILARITY):
+        self.k = k
+        self.min_similarity = min_similarity
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.event_types: list[str] = []
+        self.severities: list[str] = []
+
+    def fit(self, embeddings: np.ndarray, event_types: list[str], severities: list[str]):
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        self.matrix = (embeddings / np.maximum(norms, 1e-12)).astype(np.float32)
+        self.event_types = list(event_types)
+        self.severities = list(severities)
+        return self
+
+    def __len__(self):
+        return len(self.event_types)
+
+    def predict(self, embedding: np.ndarray) -> tuple[str | None, str | None, float]:
+        """Returns (event_type, severity, confidence)."""
+        if not len(self):
+            return None, None, 0.0
+        query = embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+        sims = self.matrix @ query
+        k = min(self.k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        if sims[top[0]] < self.min_similarity:
+            return None, None, 0.0
+
+        type_votes = defaultdict(float)
+        severity_votes = defaultdict(float)
+        for i in top:
+            weight = max(float(sims[i]), 0.0)
+            type_votes[self.event_types[i]] += weight
+            severity_votes[self.severities[i]] += weight
+        event_type = max(type_votes, key=type_votes.get)
+        severity = max(severity_votes, key=severity_votes.get)
+        total = sum(type_votes.values()) or 1.0
+        return event_type, severity, type_votes[event_type] / total
+
+
+_knn: KnnClassifier | None = None
+_knn_built_at = 0.0
+_knn_refreshing = False
+_knn_lock = threading.Lock()
+
+
+def _build_knn() -> KnnClassifier:
+    """Embed the most recent labelled events into a new index."""
+    from models import SessionLocal, BehavioralEvent, ReportJob
+    import rag_service
+
+    db = SessionLocal()
+    try:
+        # Skip background reports whose placeholder labels are not final yet
+        pending = db.query(ReportJob.event_id).filter(ReportJob.status != "done")
+        rows = (
+            db.query(BehavioralEvent.description, BehavioralEvent.event_type, BehavioralEvent.severity)
+            .filter(~BehavioralEvent.id.in_(pending))
+            .order_by(BehavioralEvent.id.desc())
+            .limit(CLASSIFIER_KNN_MAX_EXAMPLES)
+            .all()
+        )
+    finally:
+        db.close()
+
+    knn = KnnClassifier()
+    rows = [r for r in rows if r.description]
+    if rows:
+        knn.fit(
+            rag_service.embed_texts([r.description for r in rows]),
+            [r.event_type.value for r in rows],
+            [(r.severity.value if r.severity else "Medium") for r in rows],
+        )
+    logger.info(f"Event classifier: indexed {len(knn)} labelled events")
+    return knn
+
+
+def _refresh_knn():
+    """Rebuild the index off the request path and swap it in when done."""
+    global _knn, _knn_built_at, _knn_refreshing
+    try:
+        knn = _build_knn()
+        with _knn_lock:
+            _knn = knn
+    except Exception as e:
+        logger.warning(f"Event classifier kNN refresh failed, keeping the previous index: {e}")
+    finally:
+        with _knn_lock:
+            _knn_built_at = time.time()
+            _knn_refreshing = False
+
+
+def _load_knn() -> KnnClassifier:
+    """
+    The current nearest-neighbour index. Only the very first call builds it
+    inline; a stale index is returned as is while a background thread
+    rebuilds it.
+    """
+    global _knn, _knn_built_at, _knn_refreshing
+    with _knn_lock:
+        if _knn is None:
+            _knn, _knn_built_at = _build_knn(), time.time()
+        elif time.time() - _knn_built_at >= CLASSIFIER_KNN_REFRESH_SECONDS and not _knn_refreshing:
+            _knn_refreshing = True
+            threading.Thread(target=_refresh_knn, name="knn-refresh", daemon=True).start()
+        return _knn
+
+
+def warm_up():
+    """Build the kNN index ahead of the first report."""
+    if EVENT_CLASSIFIER:
+        _load_knn()
+
+
+def classify_knn(text: str) -> tuple[dict | None, float]:
+    """Nearest-neighbour stage. Returns (parsed, confidence)."""
+    import rag_service
+
+    knn = _load_knn()
+    if not len(knn):
+        return None, 0.0
+    event_type, severity, confidence = knn.predict(rag_service.embed_texts([text])[0])
+    if event_type is None:
+        return None, 0.0
+    return _parsed(text, event_type, severity), confidence
+
+
+def _record(method: str, started: float):
+    entry = _stats[method]
+    entry["count"] += 1
+    entry["latency_ms"] += (time.perf_counter() - started) * 1000
+
+
+def classify(text: str) -> dict | None:
+    """
+    Parse a report locally if a stage is confident enough, else None.
+    The kNN stage embeds the text, so call this off the event loop.
+    """
+    started = time.perf_counter()
+    if not EVENT_CLASSIFIER:
+        return None
+
+    parsed, confidence = classify_rules(text)
+    if parsed is not None and confidence >= CLASSIFIER_RULE_THRESHOLD:
+        _record("rules", started)
+        return parsed
+
+    try:
+        parsed, confidence = classify_knn(text)
+    except Exception as e:
+        logger.warning(f"Event classifier kNN stage unavailable: {e}")
+        parsed, confidence = None, 0.0
+    if parsed is not None and confidence >= CLASSIFIER_KNN_THRESHOLD:
+        _record("knn", started)
+        return parsed
+
+    _record("llm_fallback", started)
+    return None
+
+
+def classifier_stats() -> dict:
+    """Per-stage counts and mean local latency (llm_fallback excludes the LLM call)."""
+    total = sum(e["count"] for e in _stats.values())
+    return {
+        "enabled": EVENT_CLASSIFIER,
+        "total": total,
+        "local_rate": round((total - _stats["llm_fallback"]["count"]) / total, 4) if total else 0.0,
+        "stages": {
+            method: {
+                "count": e["count"],
+                "mean_latency_ms": round(e["latency_ms"] / e["count"], 3) if e["count"] else 0.0,
+            }
+            for method, e in _stats.items()
+        },
+    }
@@ -0,0 +1,283 @@
+"""
+Event Pipeline — parse → retrieve → summarize stages for a behavioral event report.
+
+Shared by the synchronous /api/events/report endpoint, the streaming variant
+and the background report queue so all produce identical events and responses.
+
+With EVENT_SPECULATIVE_RETRIEVAL=1, retrieval on the raw description runs
+concurrently with LLM parsing. Once the event type is known the speculative
+results are kept if they match it, and only a mismatch pays for a second,
+event-type retrieval.
+"""
+
+import os
+import asyncio
+import logging
+
+from models import BehavioralEvent, EventType, Severity
+from llm_scheduler import Priority
+from schemas_v2 import EventReportResponse, EventParsed, ProtocolStep
+import llm_service
+import rag_service
+import event_classifier
+
+logger = logging.getLogger(__name__)
+
+EVENT_SPECULATIVE_RETRIEVAL = os.getenv("EVENT_SPECULATIVE_RETRIEVAL", "0") in ("1", "true", "True")
+# Hybrid retrieval (RAG_SEARCH_MODE=hybrid) ranks well enough to lower this
+EVENT_PROTOCOL_RESULTS = int(os.getenv("EVENT_PROTOCOL_RESULTS", "3"))
+
+_speculation_stats = {"accepted": 0, "requeried": 0}
+
+# Only skip RAG if the parsed summary indicates explicitly positive/no-issue
+POSITIVE_KEYWORDS = [
+    "good day", "doing well", "doing good", "doing great", "doing fine",
+    "no issue", "no issues", "no concern", "no concerns", "no problem",
+    "stable", "no incident", "uneventful", "all good", "everything is fine",
+    "no notable", "routine", "normal day", "no behavioral",
+]
+
+NO_PROTOCOLS_NEEDED = {"source": "N/A", "page": 0, "steps": ["No specific protocols needed. Continue monitoring."]}
+
+
+def map_parsed(parsed: dict) -> tuple[EventType, Severity]:
+    """Map parsed LLM fields to enums (with fallback)."""
+    try:
+        event_type = EventType(parsed.get("event_type", "Other"))
+    except ValueError:
+        event_type = EventType.OTHER
+    try:
+        severity = Severity(parsed.get("severity", "Medium"))
+    except ValueError:
+        severity = Severity.MEDIUM
+    return event_type, severity
+
+
+def is_positive_report(parsed: dict, description: str, event_type: EventType, severity: Severity) -> bool:
+    """Positive/no-issue reports skip RAG entirely."""
+    if event_type != EventType.OTHER or severity != Severity.LOW:
+        return False
+    combined_text = (parsed.get("summary", "") + " " + description).lower()
+    return any(kw in combined_text for kw in POSITIVE_KEYWORDS)
+
+
+def retrieve_protocols(event_type: EventType) -> list[dict]:
+    """Search protocols via RAG, formatted for display."""
+    raw_protocols = rag_service.search_by_event_type(event_type.value, n_results=EVENT_PROTOCOL_RESULTS)
+    return rag_service.format_protocol_for_display(raw_protocols)
+
+
+def start_speculative_retrieval(description: str) -> asyncio.Task:
+    """Start description-based retrieval in a thread, to overlap with parsing."""
+    return asyncio.create_task(asyncio.to_thread(
+        rag_service.search_protocols, description, n_results=EVENT_PROTOCOL_RESULTS,
+    ))
+
+
+async def reconcile_retrieval(speculation: asyncio.Task, event_type: EventType) -> list[dict]:
+    """Keep speculative results that match the parsed event type; re-query otherwise."""
+    try:
+        raw_protocols = await speculation
+    except Exception as e:
+        logger.warning(f"Speculative retrieval failed: {e}")
+        raw_protocols = []
+    if raw_protocols and rag_service.matches_event_type(raw_protocols, event_type.value):
+        _speculation_stats["accepted"] += 1
+        return rag_service.format_protocol_for_display(raw_protocols)
+    _speculation_stats["requeried"] += 1
+    return retrieve_protocols(event_type)
+
+
+def speculation_stats() -> dict:
+    return dict(_speculation_stats)
+
+
+async def parse_report(description: str) -> dict:
+    """Parse a report with the local classifier, falling back to the LLM."""
+    parsed = await asyncio.to_thread(event_classifier.classify, description)
+    if parsed is not None:
+        return parsed
+    priority = Priority.CRITICAL if event_classifier.is_urgent(description) else Priority.REPORT
+    return await llm_service.parse_event(description, priority=priority)
+
+
+async def parse_reports_batch(descriptions: list[str]) -> list[dict]:
+    """
+    Parse many reports: the local classifier first, then one packed
+    llm_service.parse_events_batch call for everything it could not answer.
+    """
+    results = await asyncio.gather(*(asyncio.to_thread(event_classifier.classify, d) for d in descriptions))
+    pending = [i for i, parsed in enumerate(results) if parsed is None]
+    if pending:
+        parsed_batch = await llm_service.parse_events_batch([descriptions[i] for i in pending])
+        for i, parsed in zip(pending, parsed_batch):
+            results[i] = parsed
+    return results
+
+
+async def _parse_with_speculation(description: str, speculative: bool | None):
+    """Parse the report, optionally starting speculative retrieval first."""
+    if speculative is None:
+        speculative = EVENT_SPECULATIVE_RETRIEVAL
+    speculation = start_speculative_retrieval(description) if speculative else None
+    try:
+        parsed = await parse_report(description)
+    except BaseException:
+        if speculation is not None:
+            speculation.cancel()
+        raise
+    return parsed, speculation
+
+
+async def _retrieve(speculation: asyncio.Task | None, event_type: EventType) -> list[dict]:
+    if speculation is None:
+        return retrieve_protocols(event_type)
+    return await reconcile_retrieval(speculation, event_type)
+
+
+def llm_priority(severity: Severity) -> Priority:
+    """High and Critical reports jump the LLM queue."""
+    return Priority.CRITICAL if severity in (Severity.HIGH, Severity.CRITICAL) else Priority.REPORT
+
+
+async def summarize_protocols(
+    event_type: EventType, description: str, protocols: list[dict], severity: Severity = Severity.MEDIUM
+) -> list[dict]:
+    """LLM post-processing: summarize into actionable steps and merge them into `protocols`."""
+    try:
+        summarized = await llm_service.summarize_protocols_for_event(
+            event_type.value, description, protocols, priority=llm_priority(severity)
+        )
+    except Exception:
+        summarized = []
+
+    # Merge steps back into formatted protocols
+    for i, p in enumerate(protocols):
+        if i < len(summarized):
+            p["steps"] = summarized[i].get("steps", [])
+    return summarized
+
+
+async def _emit(on_stage, stage: str, **data):
+    if on_stage is not None:
+        await on_stage(stage, **data)
+
+
+async def run_pipeline(description: str, on_stage=None, speculative: bool | None = None) -> dict:
+    """
+    Run parse → retrieve → summarize for one report.
+
+    `on_stage`, if given, is awaited as on_stage(stage, **data) when each stage
+    starts or produces output. `speculative` overrides
+    EVENT_SPECULATIVE_RETRIEVAL. Returns {parsed, event_type, severity,
+    protocols, summarized}.
+    """
+    await _emit(on_stage, "parsing")
+    parsed, speculation = await _parse_with_speculation(description, speculative)
+    return await finish_pipeline(description, parsed, on_stage, speculation)
+
+
+async def finish_pipeline(
+    description: str, parsed: dict, on_stage=None, speculation: asyncio.Task | None = None
+) -> dict:
+    """Run retrieve → summarize for an already parsed report (see run_pipeline)."""
+    event_type, severity = map_parsed(parsed)
+    await _emit(on_stage, "parsed", parsed=parsed)
+
+    if is_positive_report(parsed, description, event_type, severity):
+        if speculation is not None:
+            speculation.cancel()
+        protocols = []
+        summarized = [dict(NO_PROTOCOLS_NEEDED)]
+    else:
+        await _emit(on_stage, "retrieving")
+        protocols = await _retrieve(speculation, event_type)
+        await _emit(on_stage, "summarizing", protocols=protocols)
+        summarized = await summarize_protocols(event_type, description, protocols, severity)
+
+    return {
+        "parsed": parsed,
+        "event_type": event_type,
+        "severity": severity,
+        "protocols": protocols,
+        "summarized": summarized,
+    }
+
+
+async def stream_pipeline(description: str, speculative: bool | None = None):
+    """
+    Run the pipeline, yielding (kind, data) pairs as soon as each piece exists:
+    ("parsed", parsed), one ("protocol", protocol) per retrieved protocol, one
+    ("step", {protocol_index, step}) per summarized step as the LLM produces
+    it, and finally ("result", result) in the run_pipeline format.
+    """
+    parsed, speculation = await _parse_with_speculation(description, speculative)
+    event_type, severity = map_parsed(parsed)
+    yield "parsed", parsed
+
+    if is_positive_report(parsed, description, event_type, severity):
+        if speculation is not None:
+            speculation.cancel()
+        protocols = []
+        summarized = [dict(NO_PROTOCOLS_NEEDED)]
+        for step in NO_PROTOCOLS_NEEDED["steps"]:
+            yield "step", {"protocol_index": 0, "step": step}
+    else:
+        protocols = await _retrieve(speculation, event_type)
+        for i, p in enumerate(protocols):
+            yield "protocol", {"index": i, **p}
+
+        steps: list[list[str]] = [[] for _ in protocols]
+        try:
+            async for i, step in llm_service.stream_protocol_steps(
+                event_type.value, description, protocols, priority=llm_priority(severity)
+            ):
+                steps[i].append(step)
+                yield "step", {"protocol_index": i, "step": step}
+        except Exception as e:
+            # Keep whatever steps already arrived, like the non-streaming fallback
+            logger.error(f"stream_pipeline summarization failed: {e}")
+
+        summarized = []
+        for p, s in zip(protocols, steps):
+            p["steps"] = s
+            summarized.append({"source": p.get("source", ""), "page": p.get("page", 0), "steps": s})
+
+    yield "result", {
+        "parsed": parsed,
+        "event_type": event_type,
+        "severity": severity,
+        "protocols": protocols,
+        "summarized": summarized,
+    }
+
+
+def apply_to_event(event: BehavioralEvent, result: dict):
+    """Copy pipeline output onto a BehavioralEvent row."""
+    parsed = result["parsed"]
+    event.event_type = result["event_type"]
+    event.severity = result["severity"]
+    event.location = parsed.get("location", "Unknown")
+    event.trigger = parsed.get("trigger", "Unknown")
+    event.protocol_matched = [
+        {"source": s.get("source", ""), "page": s.get("page", 0), "steps": s.get("steps", [])}
+        for s in result["summarized"]
+    ]
+
+
+def build_response(event_id: int, result: dict, transcription: str | None = None) -> EventReportResponse:
+    """Build the report response from pipeline output."""
+    if result["protocols"]:
+        response_protocols = [ProtocolStep(**p) for p in result["protocols"]]
+    else:
+        response_protocols = [
+            ProtocolStep(source=s.get("source", "N/A"), page=s.get("page", 0), steps=s.get("steps", []))
+            for s in result["summarized"]
+        ]
+
+    return EventReportResponse(
+        event_id=event_id,
+        parsed=EventParsed(**result["parsed"]),
+        protocols=response_protocols,
+        transcription=transcription,
+    )
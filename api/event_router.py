@@ -2,23 +2,31 @@
 Event Router — Behavioral event reporting with Context → Intervention → Outcome loop.
 """
 
+import json
+import asyncio
 from datetime import datetime, timezone, date
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from models import get_db, BehavioralEvent, Patient, CareStaff, Facility, EventType, Severity, ShiftType, utcnow
+from models import get_db, SessionLocal, BehavioralEvent, Patient, CareStaff, Facility, ReportJob, EventType, Severity, ShiftType, utcnow
 from schemas_v2 import (
-    EventReportResponse, EventParsed, ProtocolStep,
-    InterventionRequest, OutcomeRequest, EventOut,
+    EventReportResponse,
+    InterventionRequest, OutcomeRequest, EventOut, EventJobOut,
+    BatchReportRequest, BatchReportResponse,
 )
 import llm_service
-import rag_service
+import event_pipeline
+import report_queue
+import event_stats
+from pagination import MAX_PAGE_SIZE, paginate
 
 router = APIRouter(prefix="/api/events", tags=["Events"])
 
+BATCH_REPORT_MAX_ITEMS = 200
+
 
 def _determine_shift() -> str:
     """Determine current shift based on UTC hour (rough heuristic)."""
@@ -31,6 +39,21 @@ def _determine_shift() -> str:
         return "Night"
 
 
+def _sse(event: str, data) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _check_report_refs(db: Session, patient_id: int, reporter_id: int):
+    """Validate patient and reporter exist."""
+    patient = db.query(Patient).get(patient_id)
+    if not patient:
+        raise HTTPException(404, "Patient not found")
+    reporter = db.query(CareStaff).get(reporter_id)
+    if not reporter:
+        raise HTTPException(404, "Reporter not found")
+
+
 @router.post("/report", response_model=EventReportResponse)
 async def report_event(
     patient_id: int = Form(...),
@@ -40,13 +63,7 @@ async def report_event(
     db: Session = Depends(get_db),
 ):
     """Report a behavioral event via text or audio. Returns parsed event + matched protocols."""
-    # Validate patient and reporter exist
-    patient = db.query(Patient).get(patient_id)
-    if not patient:
-        raise HTTPException(404, "Patient not found")
-    reporter = db.query(CareStaff).get(reporter_id)
-    if not reporter:
-        raise HTTPException(404, "Reporter not found")
+    _check_report_refs(db, patient_id, reporter_id)
 
     # Get text from audio or form
     transcription = None
@@ -59,80 +76,205 @@ async def report_event(
     else:
         raise HTTPException(400, "Either text or audio file is required")
 
-    # Parse event with LLM
-    parsed = await llm_service.parse_event(description)
-
-    # Map to enums (with fallback)
-    try:
-        event_type = EventType(parsed.get("event_type", "Other"))
-    except ValueError:
-        event_type = EventType.OTHER
-    try:
-        severity = Severity(parsed.get("severity", "Medium"))
-    except ValueError:
-        severity = Severity.MEDIUM
-
-    # Skip RAG for positive/no-issue reports
-    # Only skip RAG if the parsed summary indicates explicitly positive/no-issue
-    combined_text = (parsed.get("summary", "") + " " + description).lower()
-    is_positive = any(kw in combined_text
-                      for kw in ["good day", "doing well", "doing good", "doing great", "doing fine",
-                                 "no issue", "no issues", "no concern", "no concerns", "no problem",
-                                 "stable", "no incident", "uneventful", "all good", "everything is fine",
-                                 "no notable", "routine", "normal day", "no behavioral"])
-    if event_type == EventType.OTHER and severity == Severity.LOW and is_positive:
-        protocols_formatted = []
-        summarized = [{"source": "N/A", "page": 0, "steps": ["No specific protocols needed. Continue monitoring."]}]
-    else:
-        # Search protocols via RAG
-        raw_protocols = rag_service.search_by_event_type(event_type.value)
-        protocols_formatted = rag_service.format_protocol_for_display(raw_protocols)
-
-        # LLM post-processing: summarize into actionable steps
-        try:
-            summarized = await llm_service.summarize_protocols(description, protocols_formatted)
-        except Exception:
-            summarized = []
-
-        # Merge steps back into formatted protocols
-        for i, p in enumerate(protocols_formatted):
-            if i < len(summarized):
-                p["steps"] = summarized[i].get("steps", [])
+    result = await event_pipeline.run_pipeline(description)
 
     # Create DB record
     event = BehavioralEvent(
         patient_id=patient_id,
         reporter_id=reporter_id,
         shift=_determine_shift(),
-        event_type=event_type,
-        severity=severity,
         description=description,
-        location=parsed.get("location", "Unknown"),
-        trigger=parsed.get("trigger", "Unknown"),
-        protocol_matched=[
-            {"source": s.get("source", ""), "page": s.get("page", 0), "steps": s.get("steps", [])}
-            for s in summarized
-        ],
     )
+    event_pipeline.apply_to_event(event, result)
     db.add(event)
     db.commit()
     db.refresh(event)
 
-    # Build response protocols
-    if protocols_formatted:
-        response_protocols = [ProtocolStep(**p) for p in protocols_formatted]
-    else:
-        response_protocols = [
-            ProtocolStep(source=s.get("source", "N/A"), page=s.get("page", 0), steps=s.get("steps", []))
-            for s in summarized
-        ]
+    return event_pipeline.build_response(event.id, result, transcription)
+
+
+@router.post("/report/batch", response_model=BatchReportResponse)
+async def report_events_batch(req: BatchReportRequest, db: Session = Depends(get_db)):
+    """
+    Report many text events at once (backfills, simulation replays).
+    Reports are parsed with packed LLM prompts, then retrieval and protocol
+    summaries run concurrently. All events are inserted in one transaction;
+    results are returned in request order.
+    """
+    if not req.reports:
+        return BatchReportResponse(results=[])
+    if len(req.reports) > BATCH_REPORT_MAX_ITEMS:
+        raise HTTPException(400, f"At most {BATCH_REPORT_MAX_ITEMS} reports per batch")
+
+    patient_ids = {r.patient_id for r in req.reports}
+    reporter_ids = {r.reporter_id for r in req.reports}
+    found_patients = {pid for (pid,) in db.query(Patient.id).filter(Patient.id.in_(patient_ids))}
+    found_reporters = {rid for (rid,) in db.query(CareStaff.id).filter(CareStaff.id.in_(reporter_ids))}
+    if patient_ids - found_patients:
+        raise HTTPException(404, f"Patient not found: {sorted(patient_ids - found_patients)}")
+    if reporter_ids - found_reporters:
+        raise HTTPException(404, f"Reporter not found: {sorted(reporter_ids - found_reporters)}")
+    try:
+        shifts = [ShiftType(r.shift) if r.shift else _determine_shift() for r in req.reports]
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    descriptions = [r.text for r in req.reports]
+    parsed = await event_pipeline.parse_reports_batch(descriptions)
+    results = await asyncio.gather(*(
+        event_pipeline.finish_pipeline(d, p) for d, p in zip(descriptions, parsed)
+    ))
+
+    events = []
+    for item, shift, result in zip(req.reports, shifts, results):
+        event = BehavioralEvent(
+            patient_id=item.patient_id,
+            reporter_id=item.reporter_id,
+            shift=shift,
+            description=item.text,
+            event_at=item.event_at or utcnow(),
+        )
+        event_pipeline.apply_to_event(event, result)
+        events.append(event)
+    db.add_all(events)
+    db.flush()
+    # Build the responses before committing, so a failure rolls the batch back
+    response = BatchReportResponse(results=[
+        event_pipeline.build_response(event.id, result) for event, result in zip(events, results)
+    ])
+    db.commit()
+    return response
+
+
+@router.post("/report/stream")
+async def report_event_stream(
+    patient_id: int = Form(...),
+    reporter_id: int = Form(...),
+    text: Optional[str] = Form(None),
+    audio: Optional[UploadFile] = File(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Report a behavioral event and stream processing stages as server-sent events:
+    transcription (audio only), parsed, one protocol per retrieved protocol,
+    one step per summarized step as it is generated, then done with the full
+    EventReportResponse. Errors are sent as an error event.
+    """
+    _check_report_refs(db, patient_id, reporter_id)
+
+    audio_bytes = None
+    if audio:
+        audio_bytes = await audio.read()
+        audio_filename = audio.filename or "audio.wav"
+    elif not text:
+        raise HTTPException(400, "Either text or audio file is required")
+    shift = _determine_shift()
+
+    async def events():
+        try:
+            transcription = None
+            description = text
+            if audio_bytes:
+                transcription = await llm_service.transcribe_audio(audio_bytes, audio_filename)
+                description = transcription
+                yield _sse("transcription", {"text": transcription})
+
+            result = None
+            async for kind, data in event_pipeline.stream_pipeline(description):
+                if kind == "result":
+                    result = data
+                else:
+                    yield _sse(kind, data)
+
+            # The request-scoped session may already be closed while streaming
+            stream_db = SessionLocal()
+            try:
+                event = BehavioralEvent(
+                    patient_id=patient_id,
+                    reporter_id=reporter_id,
+                    shift=shift,
+                    description=description,
+                )
+                event_pipeline.apply_to_event(event, result)
+                stream_db.add(event)
+                stream_db.commit()
+                event_id = event.id
+            finally:
+                stream_db.close()
+
+            response = event_pipeline.build_response(event_id, result, transcription)
+            yield _sse("done", response.model_dump(mode="json"))
+        except Exception as e:
+            yield _sse("error", {"detail": str(e) or type(e).__name__})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.post("/report/async", response_model=EventJobOut, status_code=202)
+async def report_event_async(
+    patient_id: int = Form(...),
+    reporter_id: int = Form(...),
+    text: Optional[str] = Form(None),
+    audio: Optional[UploadFile] = File(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Persist a report and process it in the background.
+    Returns the event id immediately; poll /api/events/jobs/{job_id} or
+    subscribe to /api/events/jobs/{job_id}/stream for progress.
+    """
+    _check_report_refs(db, patient_id, reporter_id)
+
+    audio_bytes = None
+    if audio:
+        audio_bytes = await audio.read()
+    elif not text:
+        raise HTTPException(400, "Either text or audio file is required")
 
-    return EventReportResponse(
+    # Placeholder fields are overwritten once the pipeline finishes
+    event = BehavioralEvent(
+        patient_id=patient_id,
+        reporter_id=reporter_id,
+        shift=_determine_shift(),
+        event_type=EventType.OTHER,
+        description=text or "[Audio report — transcription pending]",
+    )
+    db.add(event)
+    db.flush()
+    job = ReportJob(
         event_id=event.id,
-        parsed=EventParsed(**parsed),
-        protocols=response_protocols,
-        transcription=transcription,
+        text=text,
+        audio=audio_bytes,
+        audio_filename=audio.filename if audio else None,
     )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    report_queue.notify(job.id)
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=EventJobOut)
+def get_report_job(job_id: int, db: Session = Depends(get_db)):
+    """Get the status of a background report job."""
+    job = db.query(ReportJob).get(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_report_job(job_id: int, db: Session = Depends(get_db)):
+    """Server-sent events with job snapshots until the job is done or failed."""
+    if not db.query(ReportJob).get(job_id):
+        raise HTTPException(404, "Job not found")
+
+    async def events():
+        async for snapshot in report_queue.subscribe(job_id):
+            yield _sse("progress", snapshot)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 
 @router.post("/{event_id}/intervention")
@@ -191,13 +333,18 @@ async def record_outcome(
 
 @router.get("", response_model=list[EventOut])
 def list_events(
+    response: Response,
     patient_id: Optional[int] = None,
     shift: Optional[str] = None,
     event_date: Optional[date] = None,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    """List events with optional filters."""
+    """
+    List events with optional filters, newest first.
+    Pass the X-Next-Cursor header of a page as `cursor` (with the same filters) for the next one.
+    """
     q = db.query(BehavioralEvent)
     if patient_id:
         q = q.filter(BehavioralEvent.patient_id == patient_id)
@@ -208,7 +355,7 @@ def list_events(
             BehavioralEvent.event_at >= datetime.combine(event_date, datetime.min.time()).replace(tzinfo=timezone.utc),
             BehavioralEvent.event_at < datetime.combine(event_date, datetime.max.time()).replace(tzinfo=timezone.utc),
         )
-    return q.order_by(BehavioralEvent.event_at.desc()).limit(limit).all()
+    return paginate(q, "events", [BehavioralEvent.event_at, BehavioralEvent.id], cursor, limit, response)
 
 
 @router.get("/{event_id}", response_model=EventOut)
@@ -254,6 +401,7 @@ def bulk_clear(db: Session = Depends(get_db)):
     """Clear all events and non-seed patients for re-import. Keeps seed patients (id 1-3)."""
     deleted_events = db.query(BehavioralEvent).delete()
     deleted_patients = db.query(Patient).filter(Patient.id > 3).delete()
+    event_stats.rebuild(db)  # Query.delete() bypasses the stats listener
     db.commit()
     return {"events_deleted": deleted_events, "patients_deleted": deleted_patients}
 
@@ -367,62 +515,4 @@ def bulk_import(req: BulkImportRequest, db: Session = Depends(get_db)):
 @router.get("/stats/dashboard")
 def simulation_dashboard(db: Session = Depends(get_db)):
     """Aggregate stats for the simulation dashboard. No LLM calls."""
-    total_events = db.query(BehavioralEvent).count()
-    total_patients = db.query(Patient).count()
-    patients_with_events = db.query(BehavioralEvent.patient_id).distinct().count()
-
-    # Event type distribution
-    type_dist = db.query(
-        BehavioralEvent.event_type, func.count(BehavioralEvent.id)
-    ).group_by(BehavioralEvent.event_type).all()
-    event_types = {(t.value if hasattr(t, 'value') else str(t)): c for t, c in type_dist}
-
-    # Severity distribution
-    sev_dist = db.query(
-        BehavioralEvent.severity, func.count(BehavioralEvent.id)
-    ).group_by(BehavioralEvent.severity).all()
-    severities = {(s.value if hasattr(s, 'value') else str(s)): c for s, c in sev_dist}
-
-    # Shift distribution
-    shift_dist = db.query(
-        BehavioralEvent.shift, func.count(BehavioralEvent.id)
-    ).group_by(BehavioralEvent.shift).all()
-    shifts = {(s.value if hasattr(s, 'value') else str(s)): c for s, c in shift_dist}
-
-    # Protocol coverage (events with non-empty protocol_matched)
-    events_with_protocols = db.query(BehavioralEvent).filter(
-        BehavioralEvent.protocol_matched.isnot(None),
-        BehavioralEvent.protocol_matched != '[]',
-        BehavioralEvent.protocol_matched != 'null',
-    ).count()
-    protocol_coverage = round(events_with_protocols / total_events * 100, 1) if total_events else 0
-
-    # Intervention rate
-    events_with_intervention = db.query(BehavioralEvent).filter(
-        BehavioralEvent.intervention_description.isnot(None),
-    ).count()
-    intervention_rate = round(events_with_intervention / total_events * 100, 1) if total_events else 0
-
-    # Resolution rate
-    resolved_events = db.query(BehavioralEvent).filter(BehavioralEvent.resolved == True).count()
-    resolution_rate = round(resolved_events / total_events * 100, 1) if total_events else 0
-
-    # Top patients by event count
-    top_patients = db.query(
-        Patient.name, func.count(BehavioralEvent.id).label("count")
-    ).join(BehavioralEvent).group_by(Patient.name).order_by(
-        func.count(BehavioralEvent.id).desc()
-    ).limit(10).all()
-
-    return {
-        "total_events": total_events,
-        "total_patients": total_patients,
-        "patients_with_events": patients_with_events,
-        "event_types": event_types,
-        "severities": severities,
-        "shifts": shifts,
-        "protocol_coverage_pct": protocol_coverage,
-        "intervention_rate_pct": intervention_rate,
-        "resolution_rate_pct": resolution_rate,
-        "top_patients": [{"name": n, "events": c} for n, c in top_patients],
-    }
+    return event_stats.dashboard(db)
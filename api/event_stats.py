@@ -0,0 +1,335 @@
+"""
+Event Stats — aggregates behind /api/events/stats/dashboard.
+
+The dashboard reads materialized counters instead of scanning
+behavioral_events:
+  event_stat_buckets    events, protocol matches, interventions and
+                        resolutions per (facility, day, shift, event_type,
+                        severity)
+  patient_event_counts  events per patient
+
+An after_flush listener on SessionLocal folds every inserted, updated or
+deleted BehavioralEvent into those tables inside the same transaction, so
+report_event, record_intervention, record_outcome, bulk_import and the
+background report workers all keep them current without extra calls. The
+read is O(buckets + patients), whatever the event history.
+
+The tracked attributes are given active history, so assigning one on an
+instance expired by a commit (as report_queue does between stages) loads the
+prior value first and the listener can subtract the right bucket.
+
+Bulk SQL that bypasses the ORM (Query.delete(), Core inserts) must call
+rebuild(), which recomputes both tables from behavioral_events in one
+grouped pass. dashboard_from_events() computes the same payload straight
+from the events table and is what the consistency check compares against.
+
+Usage (from api/):
+    python event_stats.py --check      # compare counters with a full scan
+    python event_stats.py --rebuild    # recompute counters from events
+"""
+
+from sqlalchemy import and_, case, event, func, insert, inspect, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import (
+    SessionLocal, BehavioralEvent, Patient, EventStatBucket, PatientEventCount,
+    EventType, Severity, ShiftType, EVENT_STAT_BUCKET_KEY, event_stat_bucket_key,
+)
+
+TOP_PATIENTS = 10
+
+# Same conditions the dashboard has always counted
+HAS_PROTOCOL = and_(
+    BehavioralEvent.protocol_matched.isnot(None),
+    BehavioralEvent.protocol_matched != '[]',
+    BehavioralEvent.protocol_matched != 'null',
+)
+HAS_INTERVENTION = BehavioralEvent.intervention_description.isnot(None)
+IS_RESOLVED = BehavioralEvent.resolved == True
+
+BUCKET_KEY = ("facility_id", "day", "shift", "event_type", "severity")
+COUNTERS = ("events", "with_protocol", "with_intervention", "resolved")
+
+# BehavioralEvent attributes that move an event between buckets or counters
+TRACKED = (
+    "patient_id", "event_at", "shift", "event_type", "severity",
+    "protocol_matched", "intervention_description", "resolved",
+)
+
+
+def _label(value) -> str:
+    return value.value if hasattr(value, "value") else str(value)
+
+
+def _distribution(counts: dict) -> dict[str, int]:
+    """{enum member or None: count} → {label: count}, ordered as SQLite groups them (NULL, then by stored name)."""
+    ordered = sorted(counts, key=lambda v: (v is not None, v.name if v is not None else ""))
+    return {_label(v): counts[v] for v in ordered}
+
+
+def _percent(part: int, total: int):
+    return round(part / total * 100, 1) if total else 0
+
+
+def _payload(groups, per_patient: list[tuple[int, int]], names: dict[int, str]) -> dict:
+    """
+    Dashboard JSON from (event_type, severity, shift, events, with_protocol,
+    with_intervention, resolved) groups and (patient_id, events) counts.
+    """
+    event_types, severities, shifts = {}, {}, {}
+    total_events = with_protocols = with_intervention = resolved = 0
+    for event_type, severity, shift, count, protocols, interventions, resolutions in groups:
+        event_types[event_type] = event_types.get(event_type, 0) + count
+        severities[severity] = severities.get(severity, 0) + count
+        shifts[shift] = shifts.get(shift, 0) + count
+        total_events += count
+        with_protocols += protocols or 0
+        with_intervention += interventions or 0
+        resolved += resolutions or 0
+
+    # Patients sharing a name are counted together, as the dashboard always has
+    by_name: dict[str, int] = {}
+    for patient_id, count in per_patient:
+        if patient_id in names:
+            by_name[names[patient_id]] = by_name.get(names[patient_id], 0) + count
+    top_patients = sorted(by_name.items(), key=lambda item: (-item[1], item[0]))[:TOP_PATIENTS]
+
+    return {
+        "total_events": total_events,
+        "total_patients": len(names),
+        "patients_with_events": len(per_patient),
+        "event_types": _distribution(event_types),
+        "severities": _distribution(severities),
+        "shifts": _distribution(shifts),
+        "protocol_coverage_pct": _percent(with_protocols, total_events),
+        "intervention_rate_pct": _percent(with_intervention, total_events),
+        "resolution_rate_pct": _percent(resolved, total_events),
+        "top_patients": [{"name": n, "events": c} for n, c in top_patients],
+    }
+
+
+def dashboard(db: Session) -> dict:
+    """Dashboard payload from the materialized counters."""
+    groups = db.query(
+        EventStatBucket.event_type,
+        EventStatBucket.severity,
+        EventStatBucket.shift,
+        func.sum(EventStatBucket.events),
+        func.sum(EventStatBucket.with_protocol),
+        func.sum(EventStatBucket.with_intervention),
+        func.sum(EventStatBucket.resolved),
+    ).filter(EventStatBucket.events > 0).group_by(
+        EventStatBucket.event_type, EventStatBucket.severity, EventStatBucket.shift,
+    ).all()
+    per_patient = db.query(PatientEventCount.patient_id, PatientEventCount.events).filter(
+        PatientEventCount.events > 0
+    ).all()
+    names = dict(db.query(Patient.id, Patient.name).all())
+    return _payload(groups, per_patient, names)
+
+
+def dashboard_from_events(db: Session) -> dict:
+    """The same payload computed by grouped passes over behavioral_events."""
+    groups = db.query(
+        BehavioralEvent.event_type,
+        BehavioralEvent.severity,
+        BehavioralEvent.shift,
+        func.count(BehavioralEvent.id),
+        func.sum(case((HAS_PROTOCOL, 1), else_=0)),
+        func.sum(case((HAS_INTERVENTION, 1), else_=0)),
+        func.sum(case((IS_RESOLVED, 1), else_=0)),
+    ).group_by(BehavioralEvent.event_type, BehavioralEvent.severity, BehavioralEvent.shift).all()
+    per_patient = db.query(
+        BehavioralEvent.patient_id, func.count(BehavioralEvent.id)
+    ).group_by(BehavioralEvent.patient_id).all()
+    names = dict(db.query(Patient.id, Patient.name).all())
+    return _payload(groups, per_patient, names)
+
+
+def rebuild(db: Session):
+    """Recompute both counter tables from behavioral_events (the caller commits)."""
+    db.query(EventStatBucket).delete()
+    db.query(PatientEventCount).delete()
+    day = func.date(BehavioralEvent.event_at)
+    buckets = select(
+        Patient.facility_id,
+        day,
+        BehavioralEvent.shift,
+        BehavioralEvent.event_type,
+        BehavioralEvent.severity,
+        func.count(BehavioralEvent.id),
+        func.sum(case((HAS_PROTOCOL, 1), else_=0)),
+        func.sum(case((HAS_INTERVENTION, 1), else_=0)),
+        func.sum(case((IS_RESOLVED, 1), else_=0)),
+    ).select_from(BehavioralEvent).outerjoin(Patient, Patient.id == BehavioralEvent.patient_id).group_by(
+        Patient.facility_id, day, BehavioralEvent.shift, BehavioralEvent.event_type, BehavioralEvent.severity,
+    )
+    db.execute(insert(EventStatBucket).from_select(BUCKET_KEY + COUNTERS, buckets))
+    patients = select(BehavioralEvent.patient_id, func.count(BehavioralEvent.id)).group_by(BehavioralEvent.patient_id)
+    db.execute(insert(PatientEventCount).from_select(["patient_id", "events"], patients))
+
+
+def ensure_built(db: Session):
+    """Build the counters once for a database that has events but no counters yet (call at startup)."""
+    has_events = db.query(BehavioralEvent.id).limit(1).first() is not None
+    has_counters = db.query(PatientEventCount.patient_id).limit(1).first() is not None
+    if has_events and not has_counters:
+        rebuild(db)
+        db.commit()
+        print("✅ Built event stats counters from existing events")
+
+
+# --- Incremental maintenance ---
+
+def _coerce(enum_cls, value):
+    """Enum member for a stored value given as member, value ("Day") or name ("DAY")."""
+    if value is None or isinstance(value, enum_cls):
+        return value
+    try:
+        return enum_cls(value)
+    except ValueError:
+        return enum_cls[value]
+
+
+def _values(obj: BehavioralEvent, when: str) -> dict:
+    """Tracked attribute values before ("old") or after ("new") the flush."""
+    state = inspect(obj)
+    values = {}
+    for attr in TRACKED:
+        history = state.attrs[attr].history
+        if history.has_changes():
+            changed = history.deleted if when == "old" else history.added
+            values[attr] = changed[0] if changed else None
+        else:
+            values[attr] = getattr(obj, attr)
+    return values
+
+
+def _contribution(values: dict, facility_of: dict[int, int]) -> tuple[tuple, dict]:
+    """(bucket key, counters) that one event with these values adds."""
+    event_at = values["event_at"]
+    key = (
+        facility_of.get(values["patient_id"]),
+        event_at.date() if event_at is not None else None,
+        _coerce(ShiftType, values["shift"]),
+        _coerce(EventType, values["event_type"]),
+        _coerce(Severity, values["severity"]),
+    )
+    protocol = values["protocol_matched"]
+    counters = {
+        "events": 1,
+        "with_protocol": int(protocol is not None and protocol != []),
+        "with_intervention": int(values["intervention_description"] is not None),
+        "resolved": int(values["resolved"] is True),
+    }
+    return key, counters
+
+
+def _update_bucket(connection, key: tuple, deltas: dict) -> int:
+    """Add `deltas` to the bucket `key`, looked up through its unique index; returns rows updated."""
+    values = [literal(v, getattr(EventStatBucket, column).type) for column, v in zip(BUCKET_KEY, key)]
+    match = [
+        indexed == wanted
+        for indexed, wanted in zip(EVENT_STAT_BUCKET_KEY, event_stat_bucket_key(*values))
+    ]
+    return connection.execute(
+        update(EventStatBucket).where(*match).values(
+            {column: getattr(EventStatBucket, column) + delta for column, delta in deltas.items()}
+        )
+    ).rowcount
+
+
+def _apply(connection, bucket_deltas: dict[tuple, dict], patient_deltas: dict[int, int]):
+    for key, deltas in bucket_deltas.items():
+        if not any(deltas.values()):
+            continue
+        if _update_bucket(connection, key, deltas):
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(EventStatBucket).values(**dict(zip(BUCKET_KEY, key)), **deltas))
+        except IntegrityError:
+            # Another transaction created the bucket first
+            _update_bucket(connection, key, deltas)
+
+    for patient_id, delta in patient_deltas.items():
+        if not delta:
+            continue
+        result = connection.execute(
+            update(PatientEventCount).where(PatientEventCount.patient_id == patient_id)
+            .values(events=PatientEventCount.events + delta)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(PatientEventCount).values(patient_id=patient_id, events=delta))
+
+
+def _keep_prior_value(target, value, oldvalue, initiator):
+    pass
+
+
+for _attr in TRACKED:
+    event.listen(getattr(BehavioralEvent, _attr), "set", _keep_prior_value, active_history=True)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _maintain_counters(session: Session, flush_context):
+    """Fold this flush's BehavioralEvent inserts, updates and deletes into the counters."""
+    changes = []  # (sign, tracked values)
+    for obj in session.new:
+        if isinstance(obj, BehavioralEvent):
+            changes.append((1, _values(obj, "new")))
+    for obj in session.dirty:
+        if isinstance(obj, BehavioralEvent):
+            state = inspect(obj)
+            if any(state.attrs[attr].history.has_changes() for attr in TRACKED):
+                changes.append((-1, _values(obj, "old")))
+                changes.append((1, _values(obj, "new")))
+    for obj in session.deleted:
+        if isinstance(obj, BehavioralEvent):
+            changes.append((-1, _values(obj, "old")))
+    if not changes:
+        return
+
+    connection = session.connection()
+    patient_ids = {values["patient_id"] for _, values in changes}
+    facility_of = dict(connection.execute(
+        select(Patient.id, Patient.facility_id).where(Patient.id.in_(patient_ids))
+    ).all())
+
+    bucket_deltas: dict[tuple, dict] = {}
+    patient_deltas: dict[int, int] = {}
+    for sign, values in changes:
+        key, counters = _contribution(values, facility_of)
+        deltas = bucket_deltas.setdefault(key, dict.fromkeys(COUNTERS, 0))
+        for column, value in counters.items():
+            deltas[column] += sign * value
+        patient_deltas[values["patient_id"]] = patient_deltas.get(values["patient_id"], 0) + sign
+    _apply(connection, bucket_deltas, patient_deltas)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check or rebuild the materialized event stats.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the counters from behavioral_events")
+    parser.add_argument("--check", action="store_true", help="compare the counters with a full scan (default)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.rebuild:
+            rebuild(db)
+            db.commit()
+            print("✅ Rebuilt event stats counters")
+        if args.check or not args.rebuild:
+            materialized, scanned = dashboard(db), dashboard_from_events(db)
+            if materialized == scanned:
+                print(f"✅ Counters match behavioral_events ({scanned['total_events']} events)")
+            else:
+                for field in scanned:
+                    if materialized[field] != scanned[field]:
+                        print(f"❌ {field}: counters {materialized[field]} != events {scanned[field]}")
+                raise SystemExit(1)
+    finally:
+        db.close()
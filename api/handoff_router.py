@@ -3,12 +3,13 @@ Handoff Router — Shift handoff generation and acknowledgement.
 """
 
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from models import get_db, ShiftHandoff, BehavioralEvent, Patient, ShiftType, utcnow
 from schemas_v2 import HandoffGenerateRequest, HandoffOut, AcknowledgeRequest
 import llm_service
+from pagination import MAX_PAGE_SIZE, paginate
 
 router = APIRouter(prefix="/api/handoffs", tags=["Handoffs"])
 
@@ -16,9 +17,9 @@ router = APIRouter(prefix="/api/handoffs", tags=["Handoffs"])
 @router.post("/generate", response_model=HandoffOut, status_code=201)
 async def generate_handoff(req: HandoffGenerateRequest, db: Session = Depends(get_db)):
     """Generate a shift handoff by summarizing events from the current shift."""
-    # Query events for this shift
-    events = (
-        db.query(BehavioralEvent)
+    # Query events for this shift, with each patient's name from the same join
+    rows = (
+        db.query(BehavioralEvent, Patient.name)
         .filter(
             BehavioralEvent.shift == req.from_shift,
         )
@@ -29,7 +30,7 @@ async def generate_handoff(req: HandoffGenerateRequest, db: Session = Depends(ge
         .all()
     )
 
-    if not events:
+    if not rows:
         # Create empty handoff
         handoff = ShiftHandoff(
             facility_id=req.facility_id,
@@ -45,10 +46,9 @@ async def generate_handoff(req: HandoffGenerateRequest, db: Session = Depends(ge
 
     # Build events data for LLM
     events_data = []
-    for e in events:
-        patient = db.query(Patient).get(e.patient_id)
+    for e, patient_name in rows:
         events_data.append({
-            "patient_name": patient.name if patient else "Unknown",
+            "patient_name": patient_name,
             "patient_id": e.patient_id,
             "event_type": e.event_type.value if e.event_type else "Other",
             "severity": e.severity.value if e.severity else "Medium",
@@ -76,11 +76,13 @@ async def generate_handoff(req: HandoffGenerateRequest, db: Session = Depends(ge
 
 
 @router.get("", response_model=list[HandoffOut])
-def list_handoffs(facility_id: int = None, limit: int = 20, db: Session = Depends(get_db)):
+def list_handoffs(response: Response, facility_id: int = None, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+                  cursor: str = None, db: Session = Depends(get_db)):
+    """Newest first; pass a page's X-Next-Cursor header as `cursor` for the next one."""
     q = db.query(ShiftHandoff)
     if facility_id:
         q = q.filter(ShiftHandoff.facility_id == facility_id)
-    return q.order_by(ShiftHandoff.handoff_time.desc()).limit(limit).all()
+    return paginate(q, "handoffs", [ShiftHandoff.handoff_time, ShiftHandoff.id], cursor, limit, response)
 
 
 @router.get("/{handoff_id}", response_model=HandoffOut)
@@ -3,17 +3,47 @@
 Ingest PDF guidelines into ChromaDB for RAG retrieval.
 Chunks PDFs by ~500 tokens with 50-token overlap.
 Uses sentence-transformers for embeddings.
+
+Ingestion is incremental: ingest_manifest.json records a hash per PDF and
+per chunk, so only new or changed chunks are embedded; unchanged chunks are
+copied over with their stored embeddings and chunks of removed PDFs are left
+out. Pass --full to re-embed everything.
+
+Each run that changes anything builds a new versioned collection
+(dementia_care_guidelines_v<UTC timestamp>) next to the live one and then
+atomically replaces active_collection.json, which rag_service watches. The
+API never sees a half-built collection. The previous version is kept for
+in-flight queries and older ones are dropped.
+
+PDFs are extracted and chunked in parallel worker processes (--workers);
+the main process embeds their chunks in large batches as they arrive.
 """
 
 import os
 import sys
+import json
+import hashlib
+import time
+import argparse
+from bisect import bisect_right
+from itertools import accumulate
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import fitz  # PyMuPDF
 import chromadb
 from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import vector_index
+import lexical_index
+from lexical_index import LexicalIndex
+
 PDF_DIR = os.path.join(os.path.dirname(__file__), "pdfs")
 CHROMA_DIR = os.path.join(os.path.dirname(__file__), "chroma_db")
 COLLECTION_NAME = "dementia_care_guidelines"
+ACTIVE_COLLECTION_POINTER = os.path.join(CHROMA_DIR, "active_collection.json")  # watched by rag_service
+MANIFEST_PATH = os.path.join(CHROMA_DIR, "ingest_manifest.json")  # file and chunk hashes
+EMBED_BATCH_SIZE = 512  # chunks per embedding call / upsert
+DEFAULT_WORKERS = os.cpu_count() or 1
 CHUNK_SIZE = 500  # ~500 tokens ≈ ~2000 chars
 CHUNK_OVERLAP = 50  # ~50 tokens ≈ ~200 chars
 CHARS_PER_CHUNK = 800
@@ -77,14 +107,25 @@ def extract_text_from_pdf(pdf_path: str) -> list[dict]:
 
 
 def chunk_text(pages: list[dict], filename: str) -> list[dict]:
-    """Split page texts into overlapping chunks with metadata."""
-    # Concatenate all pages with page markers
-    full_text = ""
-    page_boundaries = []  # (char_offset, page_num)
-    for p in pages:
-        page_boundaries.append((len(full_text), p["page"]))
-        full_text += p["text"] + "\n\n"
+    """
+    Split page texts into overlapping chunks with metadata.
 
+    Pages are joined once and each chunk's first and last page are found by
+    bisecting the page start offsets, so the cost is linear in the document
+    size. metadata["page"] is the page the chunk starts on and
+    metadata["page_end"] the page it ends on.
+    """
+    # Concatenate all pages; page_offsets[i] is where pages[i] starts
+    parts = [p["text"] + "\n\n" for p in pages]
+    full_text = "".join(parts)
+    page_offsets = list(accumulate((len(part) for part in parts[:-1]), initial=0))
+    page_numbers = [p["page"] for p in pages]
+
+    def page_at(position: int) -> int:
+        i = bisect_right(page_offsets, position) - 1
+        return page_numbers[i] if i >= 0 else 1
+
+    meta = PDF_METADATA.get(filename, {"source": "Unknown", "title": filename, "year": "Unknown"})
     chunks = []
     start = 0
     chunk_id = 0
@@ -105,19 +146,6 @@ def chunk_text(pages: list[dict], filename: str) -> list[dict]:
             start = end - CHARS_OVERLAP
             continue
 
-        # Determine which page(s) this chunk spans
-        chunk_pages = []
-        for offset, page_num in page_boundaries:
-            if offset <= start < offset + len(full_text):
-                if start <= offset <= end or offset <= start:
-                    chunk_pages.append(page_num)
-        # Simplify: find the page for the start position
-        page_num = 1
-        for offset, pn in page_boundaries:
-            if offset <= start:
-                page_num = pn
-
-        meta = PDF_METADATA.get(filename, {"source": "Unknown", "title": filename, "year": "Unknown"})
         chunks.append({
             "id": f"{filename}::chunk_{chunk_id}",
             "text": chunk_text_content,
@@ -126,7 +154,8 @@ def chunk_text(pages: list[dict], filename: str) -> list[dict]:
                 "title": meta["title"],
                 "year": meta["year"],
                 "filename": filename,
-                "page": page_num,
+                "page": page_at(start),
+                "page_end": page_at(min(end, len(full_text)) - 1),
                 "chunk_id": chunk_id,
             },
         })
@@ -136,66 +165,263 @@ def chunk_text(pages: list[dict], filename: str) -> list[dict]:
     return chunks
 
 
-def main():
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def chunk_hash(chunk: dict) -> str:
+    """Hash of everything stored for a chunk; unchanged chunks are not re-embedded."""
+    payload = json.dumps({"text": chunk["text"], "metadata": chunk["metadata"]}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def stored_chunk_hashes(collection, ids: list[str]) -> dict:
+    """Hashes of chunks already in the collection (used when the manifest has no entry)."""
+    stored = collection.get(ids=ids, include=["documents", "metadatas"])
+    return {
+        cid: chunk_hash({"text": doc, "metadata": meta})
+        for cid, doc, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])
+    }
+
+
+def load_manifest(collection_name: str | None) -> dict:
+    """Manifest of the given collection (empty if it describes another one)."""
+    empty = {"collection": collection_name, "files": {}}
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return empty
+    return manifest if manifest.get("collection") == collection_name else empty
+
+
+def save_manifest(manifest: dict):
+    with open(MANIFEST_PATH + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(MANIFEST_PATH + ".tmp", MANIFEST_PATH)
+
+
+def _collection_names(client) -> list[str]:
+    return [c.name if hasattr(c, "name") else c for c in client.list_collections()]
+
+
+def read_active_collection(client) -> str | None:
+    """Name of the live collection, falling back to the unversioned legacy one."""
+    try:
+        with open(ACTIVE_COLLECTION_POINTER) as f:
+            return json.load(f)["collection"]
+    except FileNotFoundError:
+        pass
+    return COLLECTION_NAME if COLLECTION_NAME in _collection_names(client) else None
+
+
+def activate_collection(name: str, chunks: int):
+    """Atomically point rag_service at `name`."""
+    with open(ACTIVE_COLLECTION_POINTER + ".tmp", "w") as f:
+        json.dump({
+            "collection": name,
+            "chunks": chunks,
+            "activated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }, f)
+    os.replace(ACTIVE_COLLECTION_POINTER + ".tmp", ACTIVE_COLLECTION_POINTER)
+
+
+def drop_old_collections(client, keep: set[str]):
+    """Delete knowledge base versions other than `keep` (live and previous)."""
+    for name in _collection_names(client):
+        if name.startswith(COLLECTION_NAME) and name not in keep:
+            client.delete_collection(name)
+            print(f"Dropped old collection '{name}'")
+
+
+def copy_chunks(source, target, ids: list[str]):
+    """Copy chunks with their stored embeddings, so unchanged text is not re-embedded."""
+    for i in range(0, len(ids), EMBED_BATCH_SIZE):
+        batch = source.get(ids=ids[i : i + EMBED_BATCH_SIZE], include=["embeddings", "documents", "metadatas"])
+        target.add(
+            ids=batch["ids"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
+            embeddings=batch["embeddings"],
+        )
+
+
+def extract_and_chunk(filename: str) -> tuple[str, int, list[dict]]:
+    """Extract and chunk one PDF (runs in a worker process)."""
+    pages = extract_text_from_pdf(os.path.join(PDF_DIR, filename))
+    return filename, len(pages), chunk_text(pages, filename)
+
+
+def extract_all(filenames: list[str], workers: int):
+    """Yield (filename, page count, chunks) per PDF as workers finish them."""
+    if workers <= 1 or len(filenames) <= 1:
+        for filename in filenames:
+            yield extract_and_chunk(filename)
+        return
+    # Largest files first so one big manual does not finish last on its own
+    filenames = sorted(filenames, key=lambda f: os.path.getsize(os.path.join(PDF_DIR, f)), reverse=True)
+    with ProcessPoolExecutor(max_workers=min(workers, len(filenames))) as pool:
+        futures = [pool.submit(extract_and_chunk, f) for f in filenames]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+class ChunkWriter:
+    """Buffers chunks and embeds + upserts them in large batches."""
+
+    def __init__(self, collection, ef, batch_size: int = EMBED_BATCH_SIZE):
+        self.collection = collection
+        self.ef = ef
+        self.batch_size = batch_size
+        self.buffer: list[dict] = []
+        self.stored = 0
+        self.batches = 0
+        self.embed_seconds = 0.0
+
+    def add(self, chunks: list[dict]):
+        self.buffer.extend(chunks)
+        while len(self.buffer) >= self.batch_size:
+            self._write(self.buffer[:self.batch_size])
+            self.buffer = self.buffer[self.batch_size:]
+
+    def flush(self):
+        if self.buffer:
+            self._write(self.buffer)
+            self.buffer = []
+
+    def _write(self, batch: list[dict]):
+        started = time.perf_counter()
+        embeddings = self.ef([c["text"] for c in batch])
+        self.embed_seconds += time.perf_counter() - started
+        self.collection.upsert(
+            ids=[c["id"] for c in batch],
+            documents=[c["text"] for c in batch],
+            metadatas=[c["metadata"] for c in batch],
+            embeddings=embeddings,
+        )
+        self.stored += len(batch)
+        self.batches += 1
+        print(f"  Stored batch {self.batches} ({len(batch)} chunks)")
+
+
+def main(full: bool = False, workers: int = DEFAULT_WORKERS):
     print(f"=== Memowell RAG Knowledge Base Ingestion ===")
     print(f"PDF directory: {PDF_DIR}")
     print(f"ChromaDB directory: {CHROMA_DIR}")
+    print(f"Mode: {'full rebuild' if full else 'incremental'}, {workers} worker(s)")
     print()
 
     # Initialize ChromaDB
     client = chromadb.PersistentClient(path=CHROMA_DIR)
     ef = DefaultEmbeddingFunction()
 
-    # Delete existing collection if exists (fresh ingest)
-    try:
-        client.delete_collection(COLLECTION_NAME)
-        print(f"Deleted existing collection '{COLLECTION_NAME}'")
-    except Exception:
-        pass
+    active_name = read_active_collection(client)
+    source = client.get_collection(active_name, embedding_function=ef) if active_name else None
+    manifest = load_manifest(active_name) if source is not None and not full else {"files": {}}
+    print(f"Live collection: {active_name or '(none)'}" + (f", {source.count()} chunks" if source else ""))
+    print()
 
-    collection = client.create_collection(
-        name=COLLECTION_NAME,
+    # Hashing is cheap; only new or changed PDFs are extracted
+    pending = {}
+    pdf_files = sorted(f for f in os.listdir(PDF_DIR) if f.endswith(".pdf"))
+    for filename in pdf_files:
+        digest = file_sha256(os.path.join(PDF_DIR, filename))
+        previous = manifest["files"].get(filename)
+        if previous and previous["sha256"] == digest:
+            print(f"Unchanged:  {filename} ({len(previous['chunks'])} chunks)")
+        else:
+            pending[filename] = digest
+    removed_files = sorted(set(manifest["files"]) - set(pdf_files))
+
+    if not pending and not removed_files:
+        print(f"\n✅ Up to date: {source.count() if source else 0} chunks in '{active_name}'")
+        return
+
+    # Build the next version next to the live one; the API keeps serving the
+    # live collection until the pointer flips
+    new_name = f"{COLLECTION_NAME}_v{time.strftime('%Y%m%d%H%M%S', time.gmtime())}"
+    target = client.create_collection(
+        name=new_name,
         embedding_function=ef,
         metadata={"hnsw:space": "cosine"},
     )
-    print(f"Created collection '{COLLECTION_NAME}' with default embeddings")
-    print()
+    print(f"Building collection '{new_name}'")
+    for filename in removed_files:
+        print(f"Removed:    {filename}")
 
-    # Process each PDF
-    all_chunks = []
-    for filename in sorted(os.listdir(PDF_DIR)):
-        if not filename.endswith(".pdf"):
-            continue
-        filepath = os.path.join(PDF_DIR, filename)
-        print(f"Processing: {filename}")
+    new_manifest = {"collection": new_name, "files": {}}
+    carried = []
+    for filename in pdf_files:
+        if filename not in pending:
+            new_manifest["files"][filename] = manifest["files"][filename]
+            carried.extend(manifest["files"][filename]["chunks"])
 
-        pages = extract_text_from_pdf(filepath)
-        print(f"  Pages extracted: {len(pages)}")
+    try:
+        # Workers extract and chunk PDFs in parallel while this process embeds
+        # and stores their chunks as they arrive
+        writer = ChunkWriter(target, ef)
+        total_pages = 0
+        started = time.perf_counter()
+        extract_seconds = 0.0
+        for filename, n_pages, chunks in extract_all(list(pending), workers):
+            extract_seconds = time.perf_counter() - started
+            total_pages += n_pages
+            previous = manifest["files"].get(filename)
+            hashes = {c["id"]: chunk_hash(c) for c in chunks}
+            if previous:
+                old_hashes = previous["chunks"]
+            elif source is not None and not full:
+                old_hashes = stored_chunk_hashes(source, list(hashes))
+            else:
+                old_hashes = {}
+            changed = [c for c in chunks if old_hashes.get(c["id"]) != hashes[c["id"]]]
+            carried.extend(cid for cid, h in hashes.items() if old_hashes.get(cid) == h)
+            print(f"Processed:  {filename}: {n_pages} pages, {len(chunks)} chunks "
+                  f"({len(changed)} new or changed)")
+            writer.add(changed)
+            new_manifest["files"][filename] = {"sha256": pending[filename], "chunks": hashes}
+        writer.flush()
+        elapsed = time.perf_counter() - started
 
-        chunks = chunk_text(pages, filename)
-        print(f"  Chunks created: {len(chunks)}")
-        all_chunks.extend(chunks)
+        if carried:
+            print(f"Copying {len(carried)} unchanged chunks with their embeddings...")
+            copy_chunks(source, target, carried)
+        total = target.count()
 
-    print(f"\nTotal chunks: {len(all_chunks)}")
-    print(f"Embedding and storing...")
+        # BM25 index for hybrid retrieval, written before the flip so reloads see it
+        lexical = LexicalIndex.from_collection(target)
+        lexical_path = lexical_index.index_path(new_name)
+        lexical.save(lexical_path)
+        print(f"  Lexical index: {len(lexical.postings)} terms -> {lexical_path}")
+    except BaseException:
+        client.delete_collection(new_name)
+        print(f"❌ Ingest failed, dropped partial collection '{new_name}'")
+        raise
 
-    # Batch insert (ChromaDB handles batching internally, but limit to 500 per call)
-    BATCH_SIZE = 100
-    for i in range(0, len(all_chunks), BATCH_SIZE):
-        batch = all_chunks[i : i + BATCH_SIZE]
-        collection.add(
-            ids=[c["id"] for c in batch],
-            documents=[c["text"] for c in batch],
-            metadatas=[c["metadata"] for c in batch],
-        )
-        print(f"  Stored batch {i // BATCH_SIZE + 1} ({len(batch)} chunks)")
+    # Flip the pointer: running API processes switch on their next query
+    save_manifest(new_manifest)
+    activate_collection(new_name, total)
+    drop_old_collections(client, keep={new_name, active_name})
+    vector_index.prune_saved({new_name, active_name})
+    lexical_index.prune_saved({new_name, active_name})
+
+    if pending:
+        print(f"\n⏱  Extracted {total_pages} pages from {len(pending)} PDF(s) in {extract_seconds:.1f}s "
+              f"({total_pages / max(extract_seconds, 1e-9):.1f} pages/s)")
+        print(f"⏱  Embedded {writer.stored} chunks in {writer.embed_seconds:.1f}s "
+              f"({writer.stored / max(writer.embed_seconds, 1e-9):.1f} chunks/s); "
+              f"{writer.stored / max(elapsed, 1e-9):.1f} chunks/s end to end")
 
-    print(f"\n✅ Done! {len(all_chunks)} chunks stored in '{COLLECTION_NAME}'")
+    print(f"\n✅ Done! {total} chunks stored in '{new_name}' (now live)")
     print(f"   ChromaDB path: {CHROMA_DIR}")
 
     # Quick sanity check
     print(f"\n--- Sanity Check ---")
-    results = collection.query(
+    results = target.query(
         query_texts=["How to manage agitation in dementia patients"],
         n_results=3,
     )
@@ -205,4 +431,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Ingest PDF guidelines into ChromaDB.")
+    parser.add_argument("--full", action="store_true", help="re-extract and re-embed every PDF")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"processes extracting and chunking PDFs (default: {DEFAULT_WORKERS})")
+    args = parser.parse_args()
+    main(full=args.full, workers=args.workers)
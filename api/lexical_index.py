@@ -0,0 +1,160 @@
+"""
+Lexical Index — BM25 inverted index over the knowledge base chunks.
+
+The small embedding model blurs exact clinical terms ("haloperidol",
+"Lewy body", "F-tag 758"), so rag_service can fuse these keyword scores with
+vector similarity. knowledge_base/ingest.py builds the index for each
+collection version it activates; rag_service rebuilds it from the live
+collection if the file is missing or belongs to another version. Each
+version is saved to its own file (lexical_index.<collection>.json), and
+ingest prunes the files of versions it drops.
+
+Set via environment variables:
+  RAG_LEXICAL_INDEX_PATH=...   (default: knowledge_base/lexical_index.json;
+                                the collection name is inserted before .json)
+"""
+
+import os
+import re
+import glob
+import json
+import math
+import logging
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RAG_LEXICAL_INDEX_PATH = os.getenv(
+    "RAG_LEXICAL_INDEX_PATH", os.path.join(os.path.dirname(__file__), "knowledge_base", "lexical_index.json")
+)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can could do does for from had has have he her his how i if in into "
+    "is it its may might more most no not of on or our over she should so such than that the their them then "
+    "there these they this those to was we were what when where which while who will with would you your".split()
+)
+
+
+def index_path(collection: str, base: str = RAG_LEXICAL_INDEX_PATH) -> str:
+    """Where the index of `collection` is saved."""
+    root, ext = os.path.splitext(base)
+    return f"{root}.{collection}{ext}"
+
+
+def prune_saved(keep: set[str], base: str = RAG_LEXICAL_INDEX_PATH):
+    """Delete saved indexes of collections other than `keep`, and any pre-versioned one."""
+    root, ext = os.path.splitext(base)
+    kept = {index_path(name, base) for name in keep}
+    for path in glob.glob(glob.escape(root) + ".*" + glob.escape(ext)) + [base]:
+        if path not in kept and os.path.isfile(path):
+            os.remove(path)
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token.endswith("'s"):
+            token = token[:-2]
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class LexicalIndex:
+    """Term → (chunk rows, term frequencies) postings with BM25 scoring."""
+
+    def __init__(self, ids: list[str], documents: list[str], metadatas: list[dict],
+                 postings: dict[str, tuple[list[int], list[int]]], doc_lengths: list[int],
+                 collection: str | None = None):
+        self.collection = collection  # name of the Chroma collection it was built from
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.postings = {
+            term: (np.asarray(rows, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (rows, tfs) in postings.items()
+        }
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.avg_length = float(self.doc_lengths.mean()) if len(ids) else 0.0
+        sources = np.array([m.get("source", "") for m in metadatas], dtype=object)
+        self.source_masks = {s: sources == s for s in set(sources.tolist())}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids: list[str], documents: list[str], metadatas: list[dict],
+              collection: str | None = None) -> "LexicalIndex":
+        postings: dict[str, tuple[list[int], list[int]]] = {}
+        doc_lengths = []
+        for row, text in enumerate(documents):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                rows, tfs = postings.setdefault(term, ([], []))
+                rows.append(row)
+                tfs.append(tf)
+        return cls(list(ids), list(documents), list(metadatas), postings, doc_lengths, collection)
+
+    @classmethod
+    def from_collection(cls, collection) -> "LexicalIndex":
+        page = collection.get(include=["documents", "metadatas"])
+        return cls.build(page["ids"], page["documents"], page["metadatas"], collection.name)
+
+    def save(self, path: str):
+        data = {
+            "collection": self.collection,
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+            "doc_lengths": self.doc_lengths.astype(int).tolist(),
+            "postings": {t: [rows.tolist(), tfs.astype(int).tolist()] for t, (rows, tfs) in self.postings.items()},
+        }
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex | None":
+        """Load a saved index, or None if there is none."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        return cls(data["ids"], data["documents"], data["metadatas"], data["postings"], data["doc_lengths"],
+                   data.get("collection"))
+
+    def search(self, query: str, n_results: int, source_filter: str | None = None) -> list[tuple[int, float]]:
+        """BM25 top-k as [(row, score), ...], best first; rows without any query term are left out."""
+        n = len(self)
+        if not n:
+            return []
+        scores = np.zeros(n, dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / max(self.avg_length, 1e-9))
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            rows, tfs = posting
+            idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+            scores[rows] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[rows])
+
+        if source_filter is not None:
+            mask = self.source_masks.get(source_filter)
+            if mask is None:
+                return []
+            scores[~mask] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates):
+            return []
+        k = min(n_results, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(r), float(scores[r])) for r in top]
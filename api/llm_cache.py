@@ -0,0 +1,152 @@
+"""
+LLM Response Cache — persistent, content-addressed cache for chat completions.
+
+Keys are a SHA-256 over the provider, model, prompt version and the exact
+request (messages, temperature, max_tokens), so changing a prompt or model
+never serves stale output. Backed by SQLite so entries survive restarts and
+are shared by every worker on the host.
+
+Set via environment variables:
+  LLM_CACHE_ENABLED=1            (default: 1)
+  LLM_CACHE_PATH=./llm_cache.db  (default: next to the app DB)
+  LLM_CACHE_TTL=604800           (seconds, 0 = never expire; default: 7 days)
+  LLM_CACHE_MAX_ENTRIES=10000    (least-recently-used rows evicted beyond this)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") not in ("0", "false", "False")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+# Check the size bound every N writes rather than on every insert
+_EVICT_EVERY = 100
+
+
+def make_key(**parts) -> str:
+    """Content-address a request: stable JSON of all parts, hashed."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed key → text cache with TTL expiry and LRU eviction."""
+
+    def __init__(self, path: str, ttl: int = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY,"
+            " namespace TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_responses_accessed ON llm_responses (accessed_at)"
+        )
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str, namespace: str = "") -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, namespace, value, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, value, now, now),
+            )
+            self.writes += 1
+            if self.writes % _EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows, then least-recently-used rows above max_entries."""
+        if self.ttl:
+            cur = self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl,))
+            self.expired += cur.rowcount
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            cur = self._conn.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                " SELECT key FROM llm_responses ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += cur.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "path": self.path,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "writes": self.writes,
+        }
+
+
+_cache = None
+
+
+def get_cache() -> ResponseCache | None:
+    """Get or open the process-wide cache; None when caching is disabled."""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = ResponseCache(LLM_CACHE_PATH)
+        logger.info(f"LLM cache: {LLM_CACHE_PATH} (ttl={LLM_CACHE_TTL}s, max={LLM_CACHE_MAX_ENTRIES})")
+    return _cache
+
+
+def cache_stats() -> dict:
+    cache = get_cache()
+    return cache.stats() if cache else {"enabled": False}
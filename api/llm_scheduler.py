@@ -0,0 +1,168 @@
+"""
+LLM Scheduler — provider-aware admission control for upstream LLM calls.
+
+Every completion waits here for a slot instead of hitting the provider and
+getting a 429. Slots are granted in priority order (Critical reports first,
+background work such as handoff summaries last) when both token buckets
+(requests/minute and tokens/minute) allow it and the concurrency cap has room.
+
+Set via environment variables:
+  LLM_RPM=30              (requests per minute; default: 30 for groq, 0 = unlimited for ollama)
+  LLM_TPM=12000           (tokens per minute;   default: 12000 for groq, 0 = unlimited for ollama)
+  LLM_MAX_CONCURRENCY=8   (in-flight calls per process)
+  LLM_QUEUE_TIMEOUT=120   (max seconds a call may wait for a slot)
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import enum
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_LIMITS = {
+    "groq": {"rpm": 30, "tpm": 12000},
+    "ollama": {"rpm": 0, "tpm": 0},
+}
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "120"))
+
+
+class Priority(enum.IntEnum):
+    """Lower value is served first."""
+    CRITICAL = 0    # High/Critical severity event reports
+    REPORT = 1      # regular event parsing and protocol summaries
+    BACKGROUND = 2  # handoff summaries, batch backfills
+
+
+class QueueTimeoutError(Exception):
+    """Raised when a call waited longer than LLM_QUEUE_TIMEOUT for a slot."""
+
+
+class TokenBucket:
+    """Continuous-refill token bucket; a rate of 0 means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until `amount` can be consumed (0 if available now)."""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)  # an oversized request waits for a full bucket
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """Take tokens; may go negative to record debt from underestimates."""
+        if self.rate:
+            self._refill()
+            self.tokens -= amount
+
+    def drain(self, seconds: float):
+        """Empty the bucket so nothing is granted for about `seconds`."""
+        if self.rate:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class LLMScheduler:
+    """Priority queue of waiting calls gated by request and token buckets."""
+
+    def __init__(self, rpm: float, tpm: float, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._waiting: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = asyncio.Condition()
+        self.granted = 0
+        self.rate_limited = 0
+        self.wait_seconds = 0.0
+
+    async def acquire(self, priority: int = Priority.REPORT, est_tokens: int = 0):
+        """Wait until this call is first in line and within all limits."""
+        entry = (int(priority), next(self._seq))
+        started = time.monotonic()
+        deadline = started + LLM_QUEUE_TIMEOUT
+        async with self._cond:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == entry and self.in_flight < self.max_concurrency:
+                        delay = max(self.requests.delay_for(1), self.tokens.delay_for(est_tokens))
+                        if delay <= 0:
+                            heapq.heappop(self._waiting)
+                            self.requests.consume(1)
+                            self.tokens.consume(est_tokens)
+                            self.in_flight += 1
+                            self.granted += 1
+                            self.wait_seconds += time.monotonic() - started
+                            self._cond.notify_all()
+                            return
+                        timeout = delay
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise QueueTimeoutError(f"Waited {LLM_QUEUE_TIMEOUT}s for an LLM slot")
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=min(timeout or remaining, remaining))
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    async def release(self, est_tokens: int = 0, used_tokens: int | None = None):
+        """Free the slot and settle the token estimate against actual usage."""
+        async with self._cond:
+            self.in_flight -= 1
+            if used_tokens is not None:
+                self.tokens.consume(used_tokens - est_tokens)
+            self._cond.notify_all()
+
+    def penalize(self, retry_after: float):
+        """Provider said 429: hold all calls for `retry_after` seconds."""
+        self.rate_limited += 1
+        self.requests.drain(retry_after)
+        self.tokens.drain(retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "rpm": round(self.requests.rate * 60),
+            "tpm": round(self.tokens.rate * 60),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiting),
+            "granted": self.granted,
+            "provider_429s": self.rate_limited,
+            "mean_wait_ms": round(self.wait_seconds / self.granted * 1000, 1) if self.granted else 0.0,
+        }
+
+
+def for_provider(provider: str) -> LLMScheduler:
+    defaults = PROVIDER_LIMITS.get(provider, PROVIDER_LIMITS["groq"])
+    rpm = float(os.getenv("LLM_RPM", defaults["rpm"]))
+    tpm = float(os.getenv("LLM_TPM", defaults["tpm"]))
+    logger.info(f"LLM scheduler: {provider} rpm={rpm or 'unlimited'} tpm={tpm or 'unlimited'}")
+    return LLMScheduler(rpm, tpm)
+
+
+def estimate_tokens(messages: list, max_tokens: int) -> int:
+    """Rough prompt size (~4 chars/token) plus the completion budget."""
+    return sum(len(m.get("content", "")) for m in messages) // 4 + max_tokens
@@ -10,19 +10,41 @@ Set via environment variables:
   LLM_MODEL=model-name      (default: depends on provider)
   OLLAMA_BASE_URL=http://localhost:11434  (for ollama)
   GROQ_API_KEY=...           (for groq)
+  LLM_TIMEOUT=30             (seconds per completion, default: 30)
+  LLM_MAX_CONNECTIONS=20     (shared HTTP connection pool size)
+  LLM_CACHE_*                (response cache, see llm_cache.py)
+  LLM_RPM / LLM_TPM / ...    (rate limits and priorities, see llm_scheduler.py)
+  PROTOCOL_PERSONALIZE=0     (re-summarize reused protocol steps for dissimilar reports)
+  PROTOCOL_PERSONALIZE_MIN_SIMILARITY=0.3
+
+All provider calls go through the async SDK clients, so a slow completion
+only suspends the awaiting request instead of blocking the event loop.
 """
 
 import os
 import json
 import io
+import re
+import asyncio
 import logging
 
+import llm_cache
+import llm_scheduler
+from llm_scheduler import Priority
+from schemas_v2 import EventParsed
+
 logger = logging.getLogger(__name__)
 
 # Provider config
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower()
 LLM_MODEL = os.getenv("LLM_MODEL", "")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "5"))
+LLM_BATCH_PACK_SIZE = int(os.getenv("LLM_BATCH_PACK_SIZE", "8"))
+PROTOCOL_PERSONALIZE = os.getenv("PROTOCOL_PERSONALIZE", "0") in ("1", "true", "True")
+PROTOCOL_PERSONALIZE_MIN_SIMILARITY = float(os.getenv("PROTOCOL_PERSONALIZE_MIN_SIMILARITY", "0.3"))
 
 # Default models per provider
 DEFAULT_MODELS = {
@@ -30,7 +52,20 @@ DEFAULT_MODELS = {
     "ollama": "nemotron-3-nano:30b",
 }
 
+# Bump when a prompt changes so cached responses from the old prompt are ignored
+PROMPT_VERSIONS = {
+    "parse_event": 1,
+    "summarize_protocols": 2,
+    "stream_protocol_steps": 1,
+}
+
 _client = None
+_scheduler = None
+_summary_stats = {"reused": 0, "generated": 0, "personalized": 0}
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a provider call exceeds its timeout."""
 
 
 def _get_model() -> str:
@@ -39,48 +74,237 @@ def _get_model() -> str:
 
 
 def _get_client():
-    """Get or create the LLM client based on provider."""
+    """Get or create the async LLM client based on provider.
+
+    One client is shared per process so every request reuses the same
+    keep-alive connection pool.
+    """
     global _client
     if _client is not None:
         return _client
 
+    import httpx
+    limits = httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_CONNECTIONS,
+    )
+
     if LLM_PROVIDER == "ollama":
-        from openai import OpenAI
-        _client = OpenAI(
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        _client = AsyncOpenAI(
             base_url=f"{OLLAMA_BASE_URL}/v1",
             api_key="ollama",  # ollama doesn't need a real key
+            timeout=LLM_TIMEOUT,
+            http_client=DefaultAsyncHttpxClient(limits=limits),
         )
         logger.info(f"LLM: Using Ollama at {OLLAMA_BASE_URL} with model {_get_model()}")
     else:
-        from groq import Groq
-        _client = Groq(api_key=os.environ["GROQ_API_KEY"])
+        from groq import AsyncGroq, DefaultAsyncHttpxClient
+        _client = AsyncGroq(
+            api_key=os.environ["GROQ_API_KEY"],
+            timeout=LLM_TIMEOUT,
+            http_client=DefaultAsyncHttpxClient(limits=limits),
+        )
         logger.info(f"LLM: Using Groq with model {_get_model()}")
 
     return _client
 
 
-def _chat_completion(messages: list, temperature: float = 0.1, max_tokens: int = 300) -> str:
-    """Unified chat completion across providers."""
+def _get_scheduler() -> llm_scheduler.LLMScheduler:
+    """Get or create the process-wide rate limiter for the configured provider."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = llm_scheduler.for_provider(LLM_PROVIDER)
+    return _scheduler
+
+
+def scheduler_stats() -> dict:
+    return _get_scheduler().stats()
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Seconds to back off if `error` is a provider 429, else None."""
+    if getattr(error, "status_code", None) != 429:
+        return None
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after", 2.0))
+    except (AttributeError, TypeError, ValueError):
+        return 2.0
+
+
+async def warm_up():
+    """Create the shared client and open one pooled connection to the provider."""
     client = _get_client()
+    await asyncio.wait_for(client.models.list(), timeout=LLM_TIMEOUT)
+
+
+async def close_client():
+    """Close the shared client and its connection pool (call on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def _response_cache_key(messages: list, temperature: float, max_tokens: int, cache_as: str) -> str:
+    return llm_cache.make_key(
+        provider=LLM_PROVIDER,
+        model=_get_model(),
+        prompt=cache_as,
+        prompt_version=PROMPT_VERSIONS.get(cache_as, 0),
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+    )
+
+
+async def _chat_completion(
+    messages: list,
+    temperature: float = 0.1,
+    max_tokens: int = 300,
+    timeout: float | None = None,
+    cache_as: str | None = None,
+    priority: int = Priority.REPORT,
+    validate=None,
+) -> str:
+    """Unified chat completion across providers.
+
+    The call is bounded by `timeout` (default LLM_TIMEOUT) and is cancelled
+    together with the awaiting request if the client disconnects.
+    If `cache_as` names a prompt in PROMPT_VERSIONS, identical requests are
+    served from the persistent response cache; a fresh response is only
+    cached if `validate(content)` accepts it, so a malformed reply is not
+    replayed for the cache TTL. Cache misses wait for a
+    scheduler slot in `priority` order; provider 429s are retried after
+    the advertised back-off instead of surfacing to the caller.
+    """
     model = _get_model()
 
+    cache = llm_cache.get_cache() if cache_as else None
+    cache_key = None
+    if cache is not None:
+        cache_key = _response_cache_key(messages, temperature, max_tokens, cache_as)
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            return cached
+
+    client = _get_client()
+
     # Ollama models with reasoning (e.g. nemotron, deepseek-r1) need more tokens
     # because reasoning tokens count against max_tokens in some configs
     effective_max = max_tokens
     if LLM_PROVIDER == "ollama":
         effective_max = max(max_tokens * 3, 1000)  # Give 3x headroom for local models
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=temperature,
-        max_tokens=effective_max,
-    )
+    scheduler = _get_scheduler()
+    est_tokens = llm_scheduler.estimate_tokens(messages, effective_max)
+    for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+        try:
+            await scheduler.acquire(priority, est_tokens)
+        except llm_scheduler.QueueTimeoutError as e:
+            raise LLMTimeoutError(str(e)) from e
+        used_tokens = None
+        try:
+            response = await asyncio.wait_for(
+                client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=effective_max,
+                ),
+                timeout=timeout or LLM_TIMEOUT,
+            )
+            used_tokens = getattr(getattr(response, "usage", None), "total_tokens", None)
+            break
+        except asyncio.TimeoutError as e:
+            logger.warning(f"LLM call timed out after {timeout or LLM_TIMEOUT}s for model {model}")
+            raise LLMTimeoutError(f"LLM call timed out for model {model}") from e
+        except Exception as e:
+            retry_after = _retry_after(e)
+            if retry_after is None or attempt == LLM_RATE_LIMIT_RETRIES:
+                raise
+            logger.warning(f"LLM provider rate limited, backing off {retry_after}s")
+            scheduler.penalize(retry_after)
+        finally:
+            await scheduler.release(est_tokens, used_tokens)
     content = response.choices[0].message.content
     if not content:
         logger.warning(f"LLM returned empty content for model {model}")
         return ""
-    return content.strip()
+    content = content.strip()
+    if cache_key is not None and _is_valid(validate, content):
+        await asyncio.to_thread(cache.set, cache_key, content, namespace=cache_as)
+    return content
+
+
+def _is_valid(validate, content: str) -> bool:
+    if validate is None:
+        return True
+    try:
+        return bool(validate(content))
+    except Exception:
+        return False
+
+
+async def _chat_completion_stream(
+    messages: list,
+    temperature: float = 0.1,
+    max_tokens: int = 300,
+    timeout: float | None = None,
+    priority: int = Priority.REPORT,
+):
+    """Streaming chat completion; yields content deltas as they arrive.
+
+    `timeout` bounds the wait for each chunk rather than the whole stream.
+    The scheduler slot is held until the stream ends.
+    """
+    client = _get_client()
+    model = _get_model()
+    effective_max = max_tokens
+    if LLM_PROVIDER == "ollama":
+        effective_max = max(max_tokens * 3, 1000)
+
+    scheduler = _get_scheduler()
+    est_tokens = llm_scheduler.estimate_tokens(messages, effective_max)
+    try:
+        await scheduler.acquire(priority, est_tokens)
+    except llm_scheduler.QueueTimeoutError as e:
+        raise LLMTimeoutError(str(e)) from e
+    try:
+        stream = await asyncio.wait_for(
+            client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=effective_max,
+                stream=True,
+            ),
+            timeout=timeout or LLM_TIMEOUT,
+        )
+        chunks = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout or LLM_TIMEOUT)
+            except StopAsyncIteration:
+                break
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except asyncio.TimeoutError as e:
+        logger.warning(f"LLM stream timed out after {timeout or LLM_TIMEOUT}s for model {model}")
+        raise LLMTimeoutError(f"LLM stream timed out for model {model}") from e
+    finally:
+        await scheduler.release(est_tokens)
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for the LLM response cache."""
+    return llm_cache.cache_stats()
+
+
+def summary_stats() -> dict:
+    """Counters for reused vs. generated protocol step summaries."""
+    return dict(_summary_stats)
 
 
 def _strip_markdown_fences(raw: str) -> str:
@@ -126,60 +350,189 @@ async def transcribe_audio(audio_bytes: bytes, filename: str = "audio.wav") -> s
         logger.warning("Audio transcription not supported with Ollama, returning placeholder")
         return "[Audio transcription requires Groq provider]"
 
-    from groq import Groq
-    groq_client = Groq(api_key=os.environ["GROQ_API_KEY"])
-    transcription = groq_client.audio.transcriptions.create(
-        file=(filename, io.BytesIO(audio_bytes)),
-        model="whisper-large-v3",
-        language="en",
-    )
+    try:
+        transcription = await asyncio.wait_for(
+            _get_client().audio.transcriptions.create(
+                file=(filename, io.BytesIO(audio_bytes)),
+                model="whisper-large-v3",
+                language="en",
+            ),
+            timeout=LLM_TIMEOUT,
+        )
+    except asyncio.TimeoutError as e:
+        raise LLMTimeoutError("Audio transcription timed out") from e
     return transcription.text
 
 
-async def parse_event(text: str) -> dict:
+PARSE_EVENT_FIELDS = (
+    "- event_type: one of [Agitation, Sundowning, Refusal, Wandering, Fall, Aggression, Confusion, Sleep_Disturbance, Other]\n"
+    "- severity: one of [Low, Medium, High, Critical]\n"
+    "- location: where the event occurred (string, use 'Unknown' if not mentioned)\n"
+    "- trigger: identified trigger if mentioned (string, use 'Unknown' if not mentioned)\n"
+    "- summary: 1-2 sentence summary\n\n"
+)
+
+
+def _parse_event_messages(text: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a clinical event parser for a dementia care facility.\n"
+                "Given a caregiver's description of a behavioral event, extract:\n"
+                + PARSE_EVENT_FIELDS +
+                "Respond in JSON only. No markdown, no explanation."
+            ),
+        },
+        {"role": "user", "content": text},
+    ]
+
+
+def _parse_event_fallback(text: str) -> dict:
+    return {
+        "event_type": "Other",
+        "severity": "Medium",
+        "location": "Unknown",
+        "trigger": "Unknown",
+        "summary": text[:200],
+    }
+
+
+def _is_complete_parse(item) -> bool:
+    """True if `item` has every EventParsed field as a string."""
+    return isinstance(item, dict) and all(isinstance(item.get(field), str) for field in EventParsed.model_fields)
+
+
+def _normalize_parse(item, text: str) -> dict:
+    """Fill fields the LLM left out (or mistyped) with the fallback values."""
+    if not isinstance(item, dict):
+        raise ValueError(f"expected a JSON object, got {type(item).__name__}")
+    fallback = _parse_event_fallback(text)
+    return {**item, **{f: item[f] if isinstance(item.get(f), str) else fallback[f] for f in fallback}}
+
+
+async def parse_event(text: str, priority: int = Priority.REPORT) -> dict:
     """Parse a caregiver's event description into structured fields."""
-    raw = _chat_completion(
+    raw = await _chat_completion(
+        messages=_parse_event_messages(text),
+        temperature=0.1,
+        max_tokens=300,
+        cache_as="parse_event",
+        priority=priority,
+        validate=lambda content: _is_complete_parse(_robust_json_parse(_strip_markdown_fences(content))),
+    )
+    raw = _strip_markdown_fences(raw)
+    try:
+        return _normalize_parse(_robust_json_parse(raw), text)
+    except (json.JSONDecodeError, Exception) as e:
+        logger.error(f"parse_event fallback — raw: {raw[:200]}, error: {e}")
+        return _parse_event_fallback(text)
+
+
+async def _parse_event_pack(texts: list[str], priority: int) -> list[dict | None]:
+    """Parse several reports with one completion; None for items the LLM dropped or left incomplete."""
+    reports = "\n\n".join(f"Report {i + 1}:\n{t}" for i, t in enumerate(texts))
+    raw = await _chat_completion(
         messages=[
             {
                 "role": "system",
                 "content": (
                     "You are a clinical event parser for a dementia care facility.\n"
-                    "Given a caregiver's description of a behavioral event, extract:\n"
-                    "- event_type: one of [Agitation, Sundowning, Refusal, Wandering, Fall, Aggression, Confusion, Sleep_Disturbance, Other]\n"
-                    "- severity: one of [Low, Medium, High, Critical]\n"
-                    "- location: where the event occurred (string, use 'Unknown' if not mentioned)\n"
-                    "- trigger: identified trigger if mentioned (string, use 'Unknown' if not mentioned)\n"
-                    "- summary: 1-2 sentence summary\n\n"
-                    "Respond in JSON only. No markdown, no explanation."
+                    f"You will receive {len(texts)} numbered caregiver reports of behavioral events. "
+                    "For each report, extract:\n"
+                    "- index: the report number\n"
+                    + PARSE_EVENT_FIELDS +
+                    f"Respond with a JSON array of {len(texts)} objects in report order. "
+                    "JSON only. No markdown, no explanation."
                 ),
             },
-            {"role": "user", "content": text},
+            {"role": "user", "content": reports},
         ],
         temperature=0.1,
-        max_tokens=300,
+        max_tokens=150 * len(texts) + 100,
+        priority=priority,
     )
-    raw = _strip_markdown_fences(raw)
+    results: list[dict | None] = [None] * len(texts)
     try:
-        return _robust_json_parse(raw)
+        items = _robust_json_parse(_strip_markdown_fences(raw))
     except (json.JSONDecodeError, Exception) as e:
-        logger.error(f"parse_event fallback — raw: {raw[:200]}, error: {e}")
-        return {
-            "event_type": "Other",
-            "severity": "Medium",
-            "location": "Unknown",
-            "trigger": "Unknown",
-            "summary": text[:200],
-        }
+        logger.error(f"parse_events_batch pack unparseable — error: {e}")
+        return results
+    if not isinstance(items, list):
+        return results
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("index", position + 1)
+        if not _is_complete_parse(item):
+            continue
+        if isinstance(index, int) and 1 <= index <= len(texts) and results[index - 1] is None:
+            results[index - 1] = item
+    return results
 
 
-async def summarize_protocols(event_description: str, raw_protocols: list[dict]) -> list[dict]:
-    """Summarize raw protocol chunks into actionable steps for caregivers."""
+async def parse_events_batch(
+    texts: list[str], pack_size: int = LLM_BATCH_PACK_SIZE, priority: int = Priority.BACKGROUND
+) -> list[dict]:
+    """
+    Parse many reports, packing up to `pack_size` per completion so the system
+    prompt is paid once per pack. Packs run concurrently under the scheduler.
+    Reports already in the parse_event cache skip the LLM, and every result
+    is written back under its single-report key. Items a pack drops or
+    returns without every EventParsed field are re-parsed individually.
+    """
+    cache = llm_cache.get_cache()
+    keys = [_response_cache_key(_parse_event_messages(t), 0.1, 300, "parse_event") for t in texts]
+    results: list[dict | None] = [None] * len(texts)
+    if cache is not None:
+        stored = await asyncio.to_thread(lambda: [cache.get(key) for key in keys])
+        for i, cached in enumerate(stored):
+            if cached is not None:
+                try:
+                    item = _robust_json_parse(_strip_markdown_fences(cached))
+                except (json.JSONDecodeError, Exception):
+                    continue
+                if _is_complete_parse(item):
+                    results[i] = item
+
+    pending = [i for i, r in enumerate(results) if r is None]
+    packs = [pending[i:i + pack_size] for i in range(0, len(pending), pack_size)]
+    pack_results = await asyncio.gather(
+        *(_parse_event_pack([texts[i] for i in pack], priority) for pack in packs)
+    )
+    parsed_now = {}
+    for pack, parsed in zip(packs, pack_results):
+        for i, item in zip(pack, parsed):
+            if item is not None:
+                results[i] = item
+                parsed_now[keys[i]] = json.dumps(item)
+    if cache is not None and parsed_now:
+        await asyncio.to_thread(
+            lambda: [cache.set(key, value, namespace="parse_event") for key, value in parsed_now.items()]
+        )
+
+    missing = [i for i, r in enumerate(results) if r is None]
+    retried = await asyncio.gather(*(parse_event(texts[i], priority=priority) for i in missing))
+    for i, item in zip(missing, retried):
+        results[i] = item
+    return results
+
+
+def _protocols_prompt_text(raw_protocols: list[dict]) -> str:
     protocols_text = ""
     for i, p in enumerate(raw_protocols):
         protocols_text += f"\n--- Protocol {i+1} [Source: {p.get('source','Unknown')}, Page: {p.get('page',0)}] ---\n"
         protocols_text += p.get("text", p.get("text_preview", ""))[:500] + "\n"
+    return protocols_text
 
-    raw = _chat_completion(
+
+async def summarize_protocols(
+    event_description: str, raw_protocols: list[dict], priority: int = Priority.REPORT
+) -> list[dict]:
+    """Summarize raw protocol chunks into actionable steps for caregivers."""
+    protocols_text = _protocols_prompt_text(raw_protocols)
+
+    raw = await _chat_completion(
         messages=[
             {
                 "role": "system",
@@ -192,7 +545,8 @@ async def summarize_protocols(event_description: str, raw_protocols: list[dict])
                     "- Preserve the source reference\n"
                     "- If the event is a POSITIVE report (no behavioral issues), respond with a single entry:\n"
                     '  [{"source":"N/A","page":0,"steps":["No specific protocols needed. Continue monitoring."]}]\n\n'
-                    "Respond in JSON only: list of {source, page, steps: [str]}\n"
+                    "Respond in JSON only: list of {protocol, source, page, steps: [str]}, where protocol is\n"
+                    "the number of the protocol excerpt the steps come from.\n"
                     "No markdown, no explanation."
                 ),
             },
@@ -203,6 +557,9 @@ async def summarize_protocols(event_description: str, raw_protocols: list[dict])
         ],
         temperature=0.1,
         max_tokens=500,
+        cache_as="summarize_protocols",
+        priority=priority,
+        validate=lambda content: _is_usable_summary(_robust_json_parse(_strip_markdown_fences(content))),
     )
     raw = _strip_markdown_fences(raw)
     try:
@@ -215,7 +572,7 @@ async def summarize_protocols(event_description: str, raw_protocols: list[dict])
 async def summarize_events(events_data: list[dict]) -> dict:
     """Summarize a list of events for shift handoff. Returns {summary, pending_items}."""
     events_text = json.dumps(events_data, indent=2, default=str)
-    raw = _chat_completion(
+    raw = await _chat_completion(
         messages=[
             {
                 "role": "system",
@@ -234,6 +591,7 @@ async def summarize_events(events_data: list[dict]) -> dict:
         ],
         temperature=0.2,
         max_tokens=1000,
+        priority=Priority.BACKGROUND,
     )
     raw = _strip_markdown_fences(raw)
     try:
@@ -241,3 +599,199 @@ async def summarize_events(events_data: list[dict]) -> dict:
     except (json.JSONDecodeError, Exception) as e:
         logger.error(f"summarize_events fallback — error: {e}")
         return {"events_summary": [], "pending_items": []}
+
+
+def _text_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of lowercase word sets."""
+    wa, wb = set(a.lower().split()), set(b.lower().split())
+    if not wa or not wb:
+        return 0.0
+    return len(wa & wb) / len(wa | wb)
+
+
+def _is_usable_summary(summary) -> bool:
+    return (
+        isinstance(summary, list) and bool(summary)
+        and all(isinstance(s, dict) and s.get("steps") for s in summary)
+    )
+
+
+def _summary_store_key(event_type: str, ids: list[str]) -> str:
+    return llm_cache.make_key(
+        provider=LLM_PROVIDER,
+        model=_get_model(),
+        prompt="protocol_summary",
+        # Steps are stored by both summarize_protocols and stream_protocol_steps; bumping either prompt resets them
+        prompt_version=[PROMPT_VERSIONS["summarize_protocols"], PROMPT_VERSIONS["stream_protocol_steps"]],
+        event_type=event_type,
+        chunk_ids=sorted(ids),
+    )
+
+
+def _align_summary(summary, count: int) -> list[dict] | None:
+    """
+    Summary entries placed by their "protocol" number (1-based), one per
+    protocol; None unless every protocol has exactly one entry.
+    """
+    if not isinstance(summary, list) or len(summary) != count:
+        return None
+    aligned: list[dict | None] = [None] * count
+    for entry in summary:
+        if not isinstance(entry, dict):
+            return None
+        number = entry.get("protocol")
+        if isinstance(number, str) and number.isdigit():
+            number = int(number)
+        if not isinstance(number, int) or not 1 <= number <= count or aligned[number - 1] is not None:
+            return None
+        aligned[number - 1] = {k: v for k, v in entry.items() if k != "protocol"}
+    return aligned
+
+
+def _protocol_ids(raw_protocols: list[dict]) -> list[str]:
+    return [p.get("id") or f"{p.get('source', '')}:{p.get('page', 0)}" for p in raw_protocols]
+
+
+def _load_stored_summary(
+    event_type: str, event_description: str, ids: list[str]
+) -> tuple[list[dict] | None, bool]:
+    """
+    Stored steps for (event_type, chunk ids), re-aligned to `ids` order.
+
+    Returns (steps, exists). Steps are None on a miss, or when
+    PROTOCOL_PERSONALIZE is on and the report is less similar than
+    PROTOCOL_PERSONALIZE_MIN_SIMILARITY to the one that produced them.
+    """
+    cache = llm_cache.get_cache()
+    stored = cache.get(_summary_store_key(event_type, ids)) if cache else None
+    if stored is None:
+        return None, False
+    entry = json.loads(stored)
+    if len(entry["ids"]) != len(entry["summary"]) or sorted(entry["ids"]) != sorted(ids):
+        return None, False
+    if PROTOCOL_PERSONALIZE and _text_similarity(
+        event_description, entry["description"]
+    ) < PROTOCOL_PERSONALIZE_MIN_SIMILARITY:
+        _summary_stats["personalized"] += 1
+        return None, True
+    # Steps are stored per chunk id; re-align to the current retrieval order
+    by_id = dict(zip(entry["ids"], entry["summary"]))
+    _summary_stats["reused"] += 1
+    return [by_id[i] for i in ids if i in by_id], True
+
+
+def _store_summary(event_type: str, event_description: str, ids: list[str], summary: list[dict]):
+    cache = llm_cache.get_cache()
+    aligned = len(summary) == len(ids) == len(set(ids))
+    if cache and aligned and _is_usable_summary(summary):
+        cache.set(
+            _summary_store_key(event_type, ids),
+            json.dumps({"ids": ids, "description": event_description, "summary": summary}),
+            namespace="protocol_summary",
+        )
+
+
+async def summarize_protocols_for_event(
+    event_type: str, event_description: str, raw_protocols: list[dict], priority: int = Priority.REPORT
+) -> list[dict]:
+    """
+    Protocol steps for an event, reusing steps already generated for the same
+    event type and retrieved chunks.
+
+    The store key is (event_type, sorted chunk ids, provider, model, and the
+    versions of both step prompts); see _load_stored_summary for the personalization rule. The
+    LLM tags each summary with its protocol number, and a summary that
+    can't be matched one-to-one with the retrieved chunks is not stored.
+    """
+    ids = _protocol_ids(raw_protocols)
+    stored, exists = await asyncio.to_thread(_load_stored_summary, event_type, event_description, ids)
+    if stored is not None:
+        return stored
+
+    summary = await summarize_protocols(event_description, raw_protocols, priority=priority)
+    _summary_stats["generated"] += 1
+    aligned = _align_summary(summary, len(ids))
+    if aligned is None:
+        # Steps can't be tied to their chunks, so they are returned as is but not stored
+        logger.warning(f"summarize_protocols: {len(raw_protocols)} protocols, summary not aligned by protocol number")
+        return summary
+    for entry, p in zip(aligned, raw_protocols):
+        entry.update(source=p.get("source", "Unknown"), page=p.get("page", 0))
+    # A personalized summary is specific to this report; keep the stored one
+    if not exists:
+        await asyncio.to_thread(_store_summary, event_type, event_description, ids, aligned)
+    return aligned
+
+
+_STEP_LINE = re.compile(r"^\s*(\d+)\s*[|:.)\-]\s*(.+?)\s*$")
+
+
+async def stream_protocol_steps(
+    event_type: str, event_description: str, raw_protocols: list[dict], priority: int = Priority.REPORT
+):
+    """
+    Yield (protocol_index, step) pairs as soon as each step is available.
+
+    Stored steps are replayed immediately; otherwise the LLM is asked for one
+    "<protocol number>|<step>" line per step and each line is yielded as soon
+    as its tokens have arrived. Streamed steps are saved to the summary store.
+    """
+    ids = _protocol_ids(raw_protocols)
+    stored, exists = await asyncio.to_thread(_load_stored_summary, event_type, event_description, ids)
+    if stored is not None:
+        for i, entry in enumerate(stored):
+            for step in entry.get("steps", []):
+                yield i, step
+        return
+
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You are a clinical protocol summarizer for dementia caregivers.\n"
+                "Given a behavioral event description and numbered protocol excerpts, produce actionable steps.\n\n"
+                "Rules:\n"
+                "- For each protocol, produce 2-3 specific action steps (one sentence each)\n"
+                "- Keep language simple and direct — these are for frontline caregivers\n"
+                "- Most urgent steps first\n\n"
+                "Output one line per step, formatted exactly as: <protocol number>|<step>\n"
+                "No other text, no markdown."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"Event: {event_description}\n\nProtocols:\n{_protocols_prompt_text(raw_protocols)}",
+        },
+    ]
+
+    steps: list[list[str]] = [[] for _ in raw_protocols]
+
+    def parse_line(line: str):
+        match = _STEP_LINE.match(line)
+        if not match:
+            return None
+        i = int(match.group(1)) - 1
+        if not 0 <= i < len(raw_protocols):
+            return None
+        steps[i].append(match.group(2))
+        return i, match.group(2)
+
+    buffer = ""
+    async for delta in _chat_completion_stream(messages, temperature=0.1, max_tokens=500, priority=priority):
+        buffer += delta
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            item = parse_line(line)
+            if item:
+                yield item
+    item = parse_line(buffer)
+    if item:
+        yield item
+
+    _summary_stats["generated"] += 1
+    summary = [
+        {"source": p.get("source", "Unknown"), "page": p.get("page", 0), "steps": s}
+        for p, s in zip(raw_protocols, steps)
+    ]
+    if not exists:
+        await asyncio.to_thread(_store_summary, event_type, event_description, ids, summary)
@@ -4,8 +4,9 @@ Caregiver Copilot REST API v2.0
 """
 
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
@@ -14,7 +15,14 @@ from rag_router import router as rag_router
 from event_router import router as event_router
 from patient_router import router as patient_router
 from handoff_router import router as handoff_router
-from models import init_db, seed_demo_data
+from models import init_db, seed_demo_data, SessionLocal
+import llm_service
+import rag_service
+import report_queue
+import event_pipeline
+import event_classifier
+import event_stats
+import warmup
 
 app = FastAPI(
     title="Memowell API",
@@ -28,11 +36,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # list pagination
 )
 
 # Initialize DB + seed
 init_db()
 seed_demo_data()
+with SessionLocal() as _db:
+    event_stats.ensure_built(_db)
 
 # Routers
 app.include_router(rag_router)
@@ -41,11 +52,63 @@ app.include_router(patient_router)
 app.include_router(handoff_router)
 
 
+@app.exception_handler(llm_service.LLMTimeoutError)
+async def llm_timeout_handler(request: Request, exc: llm_service.LLMTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.on_event("startup")
+async def start_warmup():
+    # In the background, so the worker accepts connections (and /api/health) right away
+    warmup.start()
+
+
+@app.on_event("startup")
+async def start_report_workers():
+    await report_queue.start_workers()
+
+
+@app.on_event("shutdown")
+async def stop_warmup():
+    await warmup.stop()
+
+
+@app.on_event("shutdown")
+async def stop_report_workers():
+    await report_queue.stop_workers()
+
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm_service.close_client()
+
+
 @app.get("/api/health")
 def health_check():
     return {"status": "ok", "version": "2.0.0"}
 
 
+@app.get("/api/ready")
+def readiness_check():
+    """503 until warm-up has loaded the collection, embedding model and LLM client."""
+    state = warmup.status()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+
+@app.get("/api/metrics")
+def metrics():
+    """Cache and pipeline counters for monitoring."""
+    return {
+        "llm_cache": llm_service.cache_stats(),
+        "llm_scheduler": llm_service.scheduler_stats(),
+        "protocol_summaries": llm_service.summary_stats(),
+        "speculative_retrieval": event_pipeline.speculation_stats(),
+        "event_classifier": event_classifier.classifier_stats(),
+        "rag_query_embeddings": rag_service.embedding_cache_stats(),
+        "rag_mmr": rag_service.mmr_stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -7,9 +7,10 @@ import enum
 from datetime import datetime, timezone
 from sqlalchemy import (
     create_engine, Column, Integer, String, Text, Float,
-    DateTime, Boolean, Enum, ForeignKey, JSON,
+    Date, DateTime, Boolean, Enum, ForeignKey, JSON, LargeBinary, Index, func,
 )
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy.schema import CreateIndex
 
 import os
 
@@ -91,6 +92,9 @@ class Facility(Base):
 
 class Patient(Base):
     __tablename__ = "patients"
+    __table_args__ = (
+        Index("ix_patients_facility_id", "facility_id"),  # handoff generation, list_patients
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     facility_id = Column(Integer, ForeignKey("facilities.id"), nullable=False)
@@ -130,6 +134,14 @@ class CareStaff(Base):
 class BehavioralEvent(Base):
     """Core data model — behavioral event with Context → Intervention → Outcome."""
     __tablename__ = "behavioral_events"
+    __table_args__ = (
+        # list_events: filter by patient / shift / day, newest first
+        Index("ix_behavioral_events_patient_event_at", "patient_id", "event_at"),
+        Index("ix_behavioral_events_shift_event_at", "shift", "event_at"),
+        Index("ix_behavioral_events_event_at", "event_at"),
+        # event_stats grouped passes (rebuild, --check)
+        Index("ix_behavioral_events_type_severity_shift", "event_type", "severity", "shift"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
@@ -170,6 +182,11 @@ class BehavioralEvent(Base):
 class ShiftHandoff(Base):
     """Auto-generated shift handoff record."""
     __tablename__ = "shift_handoffs"
+    __table_args__ = (
+        # list_handoffs: newest first, optionally per facility
+        Index("ix_shift_handoffs_facility_time", "facility_id", "handoff_time"),
+        Index("ix_shift_handoffs_time", "handoff_time"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     facility_id = Column(Integer, ForeignKey("facilities.id"), nullable=False)
@@ -194,11 +211,95 @@ class ShiftHandoff(Base):
     acknowledged_by = relationship("CareStaff")
 
 
+class ReportJob(Base):
+    """Durable queue entry for an event report processed in the background."""
+    __tablename__ = "report_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(Integer, ForeignKey("behavioral_events.id"), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed
+    stage = Column(String(20), nullable=False, default="received")  # received → transcribing → parsing → retrieving → summarizing → done
+
+    # Raw report as received
+    text = Column(Text)
+    audio = Column(LargeBinary)
+    audio_filename = Column(String(200))
+
+    result = Column(JSON)  # EventReportResponse once done
+    error = Column(Text)
+    attempts = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+
+    event = relationship("BehavioralEvent")
+
+
+class EventStatBucket(Base):
+    """Materialized event counters per (facility, day, shift, type, severity), kept current by event_stats."""
+    __tablename__ = "event_stat_buckets"
+    __table_args__ = (
+        # Covers the dashboard's GROUP BY, so it reads the index in order instead of sorting
+        Index(
+            "ix_event_stat_buckets_dashboard",
+            "event_type", "severity", "shift", "events", "with_protocol", "with_intervention", "resolved",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    facility_id = Column(Integer, ForeignKey("facilities.id"))
+    day = Column(Date)  # date of event_at
+    shift = Column(Enum(ShiftType))
+    event_type = Column(Enum(EventType), nullable=False)
+    severity = Column(Enum(Severity))
+
+    events = Column(Integer, nullable=False, default=0)
+    with_protocol = Column(Integer, nullable=False, default=0)
+    with_intervention = Column(Integer, nullable=False, default=0)
+    resolved = Column(Integer, nullable=False, default=0)
+
+
+def event_stat_bucket_key(facility_id, day, shift, event_type, severity) -> tuple:
+    """
+    A bucket's identity as SQL expressions. NULLs never collide in a UNIQUE
+    index, so the nullable parts are coalesced; pass literals to match a key.
+    """
+    return (
+        func.coalesce(facility_id, 0),
+        func.coalesce(day, ""),
+        func.coalesce(shift, ""),
+        event_type,
+        func.coalesce(severity, ""),
+    )
+
+
+EVENT_STAT_BUCKET_KEY = event_stat_bucket_key(
+    EventStatBucket.facility_id, EventStatBucket.day, EventStatBucket.shift,
+    EventStatBucket.event_type, EventStatBucket.severity,
+)
+# One row per bucket, so racing first inserts cannot split a bucket's counts
+Index("ux_event_stat_buckets_key", *EVENT_STAT_BUCKET_KEY, unique=True)
+
+
+class PatientEventCount(Base):
+    """Materialized number of events per patient, kept current by event_stats."""
+    __tablename__ = "patient_event_counts"
+
+    patient_id = Column(Integer, ForeignKey("patients.id"), primary_key=True)
+    events = Column(Integer, nullable=False, default=0)
+
+
 # --- Initialize DB ---
 
 def init_db():
-    """Create all tables."""
+    """Create all tables, and any indexes added to tables that already exist."""
     Base.metadata.create_all(bind=engine)
+    # create_all skips existing tables entirely, so add newer indexes one by one
+    # (IF NOT EXISTS rather than checkfirst: reflection skips expression indexes)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
     print(f"✅ Database initialized: {DATABASE_URL}")
 
 
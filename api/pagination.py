@@ -0,0 +1,61 @@
+"""
+Pagination — opaque keyset cursors for list endpoints.
+
+A cursor holds the sort key of the last row a client received, and the next
+page is "rows after that key" in the listing's order. An index on the sort
+key serves that directly however deep the page is, where OFFSET would walk
+every skipped row. The key always ends in the primary key, so rows sharing a
+timestamp are neither skipped nor repeated.
+
+Cursors are base64url JSON and opaque to clients. The cursor for the next
+page comes back in the X-Next-Cursor response header (absent on the last
+page), so list bodies stay plain arrays. A cursor is only valid with the
+same listing and filters it came from.
+"""
+
+import json
+import base64
+import binascii
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500  # endpoints declare limit as Query(..., ge=1, le=MAX_PAGE_SIZE)
+
+
+def encode_cursor(listing: str, values: list) -> str:
+    payload = [listing] + [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, listing: str, keys: list) -> list:
+    """Sort-key values from a cursor issued for `listing`; 400 if it is malformed or from another listing."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or payload[0] != listing or len(payload) != len(keys) + 1:
+            raise ValueError("cursor does not belong to this listing")
+        return [
+            datetime.fromisoformat(value) if isinstance(key.type, DateTime) else value
+            for key, value in zip(keys, payload[1:])
+        ]
+    except (ValueError, TypeError, IndexError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def paginate(query, listing: str, keys: list, cursor: str | None, limit: int, response: Response,
+             descending: bool = True) -> list:
+    """
+    One page of `query` ordered by `keys` (ending in the primary key), after
+    `cursor` if given. Sets X-Next-Cursor when more rows follow.
+    """
+    if cursor:
+        after = tuple_(*decode_cursor(cursor, listing, keys))
+        query = query.filter(tuple_(*keys) < after if descending else tuple_(*keys) > after)
+    rows = query.order_by(*(k.desc() if descending else k.asc() for k in keys)).limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:max(limit, 0)]
+    if more and rows:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(listing, [getattr(rows[-1], k.key) for k in keys])
+    return rows
@@ -3,21 +3,35 @@ Patient Router — CRUD operations for patients.
 """
 
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from models import get_db, Patient
 from schemas_v2 import PatientCreate, PatientUpdate, PatientOut, PatientDetail
+from pagination import MAX_PAGE_SIZE, paginate
 
 router = APIRouter(prefix="/api/patients", tags=["Patients"])
 
 
 @router.get("", response_model=list[PatientOut])
-def list_patients(facility_id: Optional[int] = None, db: Session = Depends(get_db)):
+def list_patients(
+    response: Response,
+    facility_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Active patients by id. Without `limit` every patient is returned; with it,
+    pass a page's X-Next-Cursor header as `cursor` for the next one.
+    """
     q = db.query(Patient)
     if facility_id:
         q = q.filter(Patient.facility_id == facility_id)
-    return q.filter(Patient.is_active == True).all()
+    q = q.filter(Patient.is_active == True)
+    if limit is None and cursor is None:
+        return q.all()
+    return paginate(q, "patients", [Patient.id], cursor, 100 if limit is None else limit, response, descending=False)
 
 
 @router.get("/{patient_id}", response_model=PatientDetail)
@@ -3,12 +3,16 @@ RAG API endpoints for protocol retrieval.
 These are the core Caregiver Copilot endpoints.
 """
 
+from typing import Literal
 from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from rag_service import search_protocols, search_by_event_type
+from pydantic import BaseModel, Field
+from rag_service import search_protocols, search_protocols_batch, search_by_event_type
 
 router = APIRouter(prefix="/api/rag", tags=["RAG Protocol Retrieval"])
 
+BATCH_SEARCH_MAX_QUERIES = 500
+SEARCH_MAX_RESULTS = 50
+
 
 class ProtocolResult(BaseModel):
     text: str
@@ -21,8 +25,9 @@ class ProtocolResult(BaseModel):
 
 class SearchRequest(BaseModel):
     query: str
-    n_results: int = 5
+    n_results: int = Field(5, ge=1, le=SEARCH_MAX_RESULTS)
     source_filter: str | None = None
+    mode: Literal["vector", "hybrid"] | None = None  # default: RAG_SEARCH_MODE
 
 
 class SearchResponse(BaseModel):
@@ -31,9 +36,17 @@ class SearchResponse(BaseModel):
     count: int
 
 
+class BatchSearchRequest(BaseModel):
+    queries: list[SearchRequest]
+
+
+class BatchSearchResponse(BaseModel):
+    results: list[SearchResponse]  # same order as the request
+
+
 class EventSearchRequest(BaseModel):
     event_type: str
-    n_results: int = 5
+    n_results: int = Field(5, ge=1, le=SEARCH_MAX_RESULTS)
 
 
 @router.post("/search", response_model=SearchResponse)
@@ -48,6 +61,7 @@ def rag_search(req: SearchRequest):
         query=req.query,
         n_results=req.n_results,
         source_filter=req.source_filter,
+        mode=req.mode,
     )
     return SearchResponse(
         query=req.query,
@@ -56,6 +70,22 @@ def rag_search(req: SearchRequest):
     )
 
 
+@router.post("/search/batch", response_model=BatchSearchResponse)
+def rag_search_batch(req: BatchSearchRequest):
+    """
+    Search many queries in one request (dashboards, evaluation jobs).
+    Each query has its own n_results and source_filter; queries are embedded
+    in one batch and results are returned in request order.
+    """
+    if len(req.queries) > BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(400, f"At most {BATCH_SEARCH_MAX_QUERIES} queries per batch")
+    results = search_protocols_batch([q.model_dump() for q in req.queries])
+    return BatchSearchResponse(results=[
+        SearchResponse(query=q.query, results=[ProtocolResult(**r) for r in rows], count=len(rows))
+        for q, rows in zip(req.queries, results)
+    ])
+
+
 @router.post("/event", response_model=SearchResponse)
 def rag_event_search(req: EventSearchRequest):
     """
@@ -1,35 +1,498 @@
 """
 RAG Service — Protocol retrieval from ChromaDB.
 Only retrieves, never generates care advice. Zero hallucination by design.
+
+Event-type lookups use a closed set of queries, so their top-k results are
+computed once and served from memory.
+
+knowledge_base/ingest.py builds each knowledge base version as a new
+collection and then atomically rewrites ACTIVE_COLLECTION_POINTER. Every
+lookup checks the pointer's mtime; on a change one thread opens the new
+collection and, outside the swap lock, rebuilds the event-type table and
+the indexes the old collection had loaded against it, then swaps them all
+in together. Other threads keep searching the old collection meanwhile.
+Queries never see a missing or half-built collection, and there is no
+cold-table spike after a refresh. A pointer naming a collection that cannot
+be opened is logged once and ignored until it changes again.
+
+With RAG_BACKEND=numpy, queries are embedded here and answered by an exact
+in-memory scan (see vector_index.py) instead of a Chroma query.
+
+Query texts are embedded through embedding_cache, so repeated searches and
+event-type lookups skip the embedding model.
+
+With RAG_SEARCH_MODE=hybrid (or mode="hybrid" per call), vector results are
+fused with BM25 keyword results from lexical_index.py by reciprocal rank
+fusion, so exact clinical terms rank well enough to request fewer chunks.
+
+Adjacent chunks overlap by CHARS_OVERLAP characters and often rank together,
+so every result list is reranked by maximal marginal relevance over the
+chunks' stored embeddings: a chunk nearly identical to one already chosen
+is dropped, and the rest are ordered to trade relevance against similarity
+to what is already selected. A chunk next to a chosen one (same file, chunk
+number ±1) counts as fully similar to it, so it ranks behind comparably
+relevant chunks instead of being dropped.
+
+Set via environment variables:
+  RAG_MMR=1                      (rerank and drop redundant chunks; default: 1)
+  RAG_MMR_LAMBDA=0.7             (1.0 = relevance only)
+  RAG_MMR_POOL=1                 (candidates per requested result; 1 = only
+                                  drop redundant chunks, >1 = backfill them)
+  RAG_MMR_DUPLICATE_SIMILARITY=0.92
 """
 
 import os
-import chromadb
-from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+import json
+import time
+import logging
+import threading
+import numpy as np
+
+from vector_index import VectorIndex, normalize, index_dir
+from embedding_cache import EmbeddingCache, RAG_EMBED_CACHE_SIZE
+from lexical_index import LexicalIndex, index_path
+
+logger = logging.getLogger(__name__)
 
 CHROMA_DIR = os.path.join(os.path.dirname(__file__), "knowledge_base", "chroma_db")
-COLLECTION_NAME = "dementia_care_guidelines"
+COLLECTION_NAME = "dementia_care_guidelines"  # served when there is no pointer (pre-versioning layout)
+ACTIVE_COLLECTION_POINTER = os.path.join(CHROMA_DIR, "active_collection.json")
+RAG_BACKEND = os.getenv("RAG_BACKEND", "chroma")  # chroma | numpy
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # what DefaultEmbeddingFunction runs; part of cache keys
+RAG_SEARCH_MODE = os.getenv("RAG_SEARCH_MODE", "vector")  # vector | hybrid
+SEARCH_MODES = ("vector", "hybrid")
+
+# Reciprocal rank fusion: each list contributes 1 / (RRF_K + rank)
+RRF_K = 60
+RAG_HYBRID_CANDIDATES = int(os.getenv("RAG_HYBRID_CANDIDATES", "20"))  # per list, before fusion
+
+# Maximal marginal relevance reranking
+RAG_MMR = os.getenv("RAG_MMR", "1") not in ("0", "false", "False")
+RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+RAG_MMR_POOL = max(1, int(os.getenv("RAG_MMR_POOL", "1")))
+RAG_MMR_DUPLICATE_SIMILARITY = float(os.getenv("RAG_MMR_DUPLICATE_SIMILARITY", "0.92"))
+
+# Results precomputed per event type; smaller n_results are served as a prefix
+PRECOMPUTE_N_RESULTS = int(os.getenv("RAG_PRECOMPUTE_N_RESULTS", "5"))
+
+# Optimized search queries per behavioral event type
+EVENT_TYPE_QUERIES = {
+    "agitation": "managing agitation aggressive behavior dementia non-pharmacological intervention",
+    "sundowning": "sundowning late afternoon evening confusion dementia management strategies",
+    "wandering": "wandering elopement prevention dementia patient safety environmental modification",
+    "refusal": "medication refusal food refusal dementia patient care strategies compliance",
+    "fall": "fall prevention dementia patient safety assessment risk factors intervention",
+    "aggression": "aggressive behavior dementia de-escalation techniques non-pharmacological management",
+    "confusion": "acute confusion delirium dementia assessment differential diagnosis management",
+    "sleep_disturbance": "sleep disturbance insomnia dementia non-pharmacological sleep hygiene",
+}
+EVENT_TYPES = list(EVENT_TYPE_QUERIES) + ["other"]
+
+# Word stems that mark a retrieved chunk as relevant to an event type
+EVENT_TYPE_KEYWORDS = {
+    "agitation": ["agitat", "restless", "distress"],
+    "sundowning": ["sundown", "late afternoon", "evening"],
+    "wandering": ["wander", "elope", "exit-seeking"],
+    "refusal": ["refus", "resist", "declin"],
+    "fall": ["fall", "falls"],
+    "aggression": ["aggress", "violen", "hitting", "de-escalat"],
+    "confusion": ["confus", "delirium", "disorient"],
+    "sleep_disturbance": ["sleep", "insomnia", "night"],
+}
 
 _client = None
 _collection = None
+_collection_name = COLLECTION_NAME
+_embedding_function = None
+_vector_index: VectorIndex | None = None
+_lexical_index: LexicalIndex | None = None
+_embedding_cache: EmbeddingCache | None = None
+_pointer_stamp = -1  # forces the first lookup to read the pointer
+_pointer_read: tuple[int | None, str] = (None, COLLECTION_NAME)  # last (mtime, collection) read from it
+_refreshing_stamp = -1  # pointer being switched to by another thread
+_failed_stamp = -1  # pointer whose collection could not be opened
+_swap_lock = threading.RLock()
+# The refreshing thread's new collection and indexes, before they go live
+_staging = threading.local()
+_event_type_table: dict[str, list[dict]] = {}
+_mmr_stats = {"candidates": 0, "returned": 0, "penalized_adjacent": 0, "dropped_similar": 0}
+
+
+def _read_active_pointer() -> tuple[int | None, str]:
+    """(mtime, collection name) of the pointer written by ingest; re-read only when its mtime changes."""
+    global _pointer_read
+    try:
+        stamp = os.stat(ACTIVE_COLLECTION_POINTER).st_mtime_ns
+        if stamp != _pointer_read[0]:
+            with open(ACTIVE_COLLECTION_POINTER) as f:
+                _pointer_read = stamp, json.load(f)["collection"]
+        return _pointer_read
+    except FileNotFoundError:
+        return None, COLLECTION_NAME
+
+
+def _open_collection(name: str):
+    global _client
+    if _client is None:
+        import chromadb  # deferred: ~1s to import, and only retrieval needs it
+        _client = chromadb.PersistentClient(path=CHROMA_DIR)
+    return _client.get_collection(name=name, embedding_function=_get_embedding_function())
+
+
+def _check_reingested():
+    """Switch to the collection named by the active pointer once ingest flips it."""
+    global _collection, _collection_name, _vector_index, _lexical_index, _event_type_table
+    global _pointer_stamp, _refreshing_stamp, _failed_stamp
+    stamp, name = _read_active_pointer()
+    if stamp in (_pointer_stamp, _refreshing_stamp, _failed_stamp):
+        return
+    with _swap_lock:
+        if stamp in (_pointer_stamp, _refreshing_stamp, _failed_stamp):
+            return  # already switched, being switched, or known to be broken
+        if _collection is None:
+            # Nothing loaded yet: just remember which collection to open
+            _collection_name, _pointer_stamp = name, stamp
+            return
+        _refreshing_stamp = stamp
+        was_warm = bool(_event_type_table)
+        load_vector, load_lexical = _vector_index is not None, _lexical_index is not None
+
+    try:
+        collection = _open_collection(name)
+    except Exception as e:
+        logger.error(f"RAG: cannot open collection '{name}', still serving '{_collection_name}': {e}")
+        with _swap_lock:
+            _failed_stamp, _refreshing_stamp = stamp, -1
+        return
+
+    # Warm the new collection in this thread only; everyone else still searches the old one
+    staged = {"collection": collection, "vector_index": None, "lexical_index": None}
+    table = {}
+    _staging.state = staged
+    try:
+        if load_vector:
+            _get_vector_index()
+        if load_lexical:
+            _get_lexical_index()
+        if was_warm:
+            table = _compute_event_type_table()
+    except Exception as e:
+        logger.error(f"RAG: could not warm collection '{name}' before switching: {e}")
+        table = {}
+    finally:
+        _staging.state = None
+
+    with _swap_lock:
+        _collection, _collection_name = collection, name
+        _vector_index, _lexical_index = staged["vector_index"], staged["lexical_index"]
+        _event_type_table = table
+        _pointer_stamp, _refreshing_stamp = stamp, -1
+    logger.info(f"RAG: knowledge base refreshed, switched to collection '{name}'")
+
+
+def _get_embedding_function():
+    global _embedding_function
+    if _embedding_function is None:
+        from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+        _embedding_function = DefaultEmbeddingFunction()
+    return _embedding_function
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """Embed texts with the collection's model; returns an (n, dim) float32 array."""
+    return np.asarray(_get_embedding_function()(texts), dtype=np.float32)
+
+
+def _get_embedding_cache() -> EmbeddingCache | None:
+    global _embedding_cache
+    if RAG_EMBED_CACHE_SIZE <= 0:
+        return None
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(EMBEDDING_MODEL)
+    return _embedding_cache
+
+
+def embed_queries(texts: list[str]) -> np.ndarray:
+    """Embed query texts, serving repeats from the query embedding cache."""
+    cache = _get_embedding_cache()
+    if cache is None:
+        return embed_texts(texts)
+    vectors = cache.get_many(texts)
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        started = time.perf_counter()
+        embedded = embed_texts(unique)
+        cache.record_embedding(len(unique), time.perf_counter() - started)
+        cache.put_many(unique, embedded)
+        by_text = dict(zip(unique, embedded))
+        for i in missing:
+            vectors[i] = by_text[texts[i]]
+    return np.stack(vectors)
+
+
+def embedding_cache_stats() -> dict:
+    cache = _get_embedding_cache()
+    return cache.stats() if cache else {"enabled": False}
+
+
+def _staged() -> dict | None:
+    return getattr(_staging, "state", None)
 
 
 def _get_collection():
-    global _client, _collection
+    global _collection
+    staged = _staged()
+    if staged is not None:
+        return staged["collection"]
+    _check_reingested()
     if _collection is None:
-        _client = chromadb.PersistentClient(path=CHROMA_DIR)
-        ef = DefaultEmbeddingFunction()
-        _collection = _client.get_collection(
-            name=COLLECTION_NAME,
-            embedding_function=ef,
-        )
+        with _swap_lock:
+            if _collection is None:
+                _collection = _open_collection(_collection_name)
     return _collection
 
 
+def active_collection() -> str:
+    """Name of the collection currently served."""
+    _check_reingested()
+    return _collection_name
+
+
+def _load_vector_index(collection) -> VectorIndex:
+    """Load the saved NumPy index, rebuilding it from Chroma if missing or stale."""
+    path = index_dir(collection.name)
+    index = VectorIndex.load(path)
+    if index is None or index.stamp != collection.name:
+        index = VectorIndex.from_collection(collection, stamp=collection.name)
+        try:
+            index.save(path)
+        except OSError as e:
+            logger.warning(f"RAG: could not save vector index: {e}")
+        logger.info(f"RAG: built vector index with {len(index)} chunks")
+    return index
+
+
+def _load_lexical_index(collection) -> LexicalIndex:
+    """Load the BM25 index written by ingest, rebuilding it if it belongs to another collection."""
+    path = index_path(collection.name)
+    index = LexicalIndex.load(path)
+    if index is None or index.collection != collection.name:
+        index = LexicalIndex.from_collection(collection)
+        try:
+            index.save(path)
+        except OSError as e:
+            logger.warning(f"RAG: could not save lexical index: {e}")
+        logger.info(f"RAG: built lexical index with {len(index)} chunks")
+    return index
+
+
+def _get_vector_index() -> VectorIndex:
+    global _vector_index
+    staged = _staged()
+    if staged is not None:
+        if staged["vector_index"] is None:
+            staged["vector_index"] = _load_vector_index(staged["collection"])
+        return staged["vector_index"]
+    collection = _get_collection()
+    with _swap_lock:
+        if _vector_index is None:
+            _vector_index = _load_vector_index(collection)
+        return _vector_index
+
+
+def _get_lexical_index() -> LexicalIndex:
+    global _lexical_index
+    staged = _staged()
+    if staged is not None:
+        if staged["lexical_index"] is None:
+            staged["lexical_index"] = _load_lexical_index(staged["collection"])
+        return staged["lexical_index"]
+    collection = _get_collection()
+    with _swap_lock:
+        if _lexical_index is None:
+            _lexical_index = _load_lexical_index(collection)
+        return _lexical_index
+
+
+def _result_row(chunk_id: str, text: str, meta: dict, score: float | None) -> dict:
+    return {
+        "id": chunk_id,
+        "text": text,
+        "source": meta.get("source", "Unknown"),
+        "title": meta.get("title", "Unknown"),
+        "page": meta.get("page", 0),
+        "filename": meta.get("filename", ""),
+        "score": round(score, 4) if score is not None else None,
+    }
+
+
+def _search_numpy(embeddings: np.ndarray, n_results: int, source_filter: str | None) -> list[list[dict]]:
+    index = _get_vector_index()
+    return [
+        [_result_row(index.ids[i], index.documents[i], index.metadatas[i], score) for i, score in hits]
+        for hits in index.search(embeddings, n_results, source_filter or None)
+    ]
+
+
+def _search_chroma(embeddings: np.ndarray, n_results: int, source_filter: str | None) -> list[list[dict]]:
+    collection = _get_collection()
+    
+    where_filter = None
+    if source_filter:
+        where_filter = {"source": source_filter}
+    
+    results = collection.query(
+        query_embeddings=embeddings.tolist(),
+        n_results=n_results,
+        where=where_filter,
+    )
+    
+    output = []
+    for q in range(len(embeddings)):
+        rows = []
+        for i in range(len(results["documents"][q])):
+            distance = results["distances"][q][i] if results.get("distances") else None
+            rows.append(_result_row(
+                results["ids"][q][i],
+                results["documents"][q][i],
+                results["metadatas"][q][i],
+                1 - distance if distance is not None else None,
+            ))
+        output.append(rows)
+    return output
+
+
+def _vector_search(embeddings: np.ndarray, n_results: int, source_filter: str | None) -> list[list[dict]]:
+    """Top-k rows for each query embedding from the configured backend."""
+    if RAG_BACKEND == "numpy":
+        return _search_numpy(embeddings, n_results, source_filter)
+    return _search_chroma(embeddings, n_results, source_filter)
+
+
+def _fuse(vector_rows: list[dict], lexical_hits: list[tuple[int, float]], lexical: LexicalIndex,
+          n_results: int) -> list[dict]:
+    """Reciprocal rank fusion of one query's vector rows and BM25 hits."""
+    fused: dict[str, float] = {}
+    rows: dict[str, dict] = {}
+    for rank, row in enumerate(vector_rows):
+        fused[row["id"]] = 1 / (RRF_K + rank + 1)
+        rows[row["id"]] = row
+    for rank, (i, _) in enumerate(lexical_hits):
+        chunk_id = lexical.ids[i]
+        fused[chunk_id] = fused.get(chunk_id, 0.0) + 1 / (RRF_K + rank + 1)
+        if chunk_id not in rows:
+            rows[chunk_id] = _result_row(chunk_id, lexical.documents[i], lexical.metadatas[i], None)
+
+    best = sorted(fused, key=fused.get, reverse=True)[:n_results]
+    # Scale so a chunk ranked first by both lists scores 1.0
+    top_score = 2 / (RRF_K + 1)
+    return [{**rows[chunk_id], "score": round(fused[chunk_id] / top_score, 4)} for chunk_id in best]
+
+
+def _ranked(queries: list[str], embeddings: np.ndarray, n_results: int, source_filter: str | None,
+            mode: str | None) -> list[list[dict]]:
+    """Top-k rows for each query in the requested search mode, before reranking."""
+    if (mode or RAG_SEARCH_MODE) != "hybrid":
+        return _vector_search(embeddings, n_results, source_filter)
+
+    depth = max(n_results, RAG_HYBRID_CANDIDATES)
+    lexical = _get_lexical_index()
+    return [
+        _fuse(rows, lexical.search(query, depth, source_filter or None), lexical, n_results)
+        for query, rows in zip(queries, _vector_search(embeddings, depth, source_filter))
+    ]
+
+
+def _chunk_embeddings(ids: list[str]) -> dict[str, np.ndarray]:
+    """Stored, L2-normalized embeddings of the given chunks (nothing is re-embedded)."""
+    if not ids:
+        return {}
+    if RAG_BACKEND == "numpy":
+        index = _get_vector_index()
+        return {chunk_id: index.matrix[index.row_of[chunk_id]] for chunk_id in ids if chunk_id in index.row_of}
+    page = _get_collection().get(ids=ids, include=["embeddings"])
+    vectors = normalize(np.asarray(page["embeddings"], dtype=np.float32).reshape(len(page["ids"]), -1))
+    return dict(zip(page["ids"], vectors))
+
+
+def _chunk_position(chunk_id: str) -> tuple[str, int] | None:
+    """(filename, chunk number) from an ingest chunk id "<filename>::chunk_<n>"."""
+    filename, sep, number = chunk_id.rpartition("::chunk_")
+    if not sep or not number.isdigit():
+        return None
+    return filename, int(number)
+
+
+def _is_adjacent(a: tuple[str, int] | None, b: tuple[str, int] | None) -> bool:
+    return a is not None and b is not None and a[0] == b[0] and abs(a[1] - b[1]) <= 1
+
+
+def _mmr(rows: list[dict], vectors: dict[str, np.ndarray], n_results: int) -> list[dict]:
+    """
+    Greedy maximal marginal relevance over one query's ranked rows.
+    Rows nearly duplicating an already selected chunk are dropped; rows next
+    to one are scored as if identical to it.
+    """
+    positions = {r["id"]: _chunk_position(r["id"]) for r in rows}
+    candidates = list(rows)
+    selected: list[dict] = []
+    while candidates and len(selected) < n_results:
+        best, best_score = None, -np.inf
+        for row in list(candidates):
+            vector = vectors.get(row["id"])
+            redundancy = 0.0
+            adjacent = False
+            for chosen in selected:
+                other = vectors.get(chosen["id"])
+                if vector is not None and other is not None:
+                    redundancy = max(redundancy, float(vector @ other))
+                adjacent = adjacent or _is_adjacent(positions[row["id"]], positions[chosen["id"]])
+            if redundancy >= RAG_MMR_DUPLICATE_SIMILARITY:
+                _mmr_stats["dropped_similar"] += 1
+                candidates.remove(row)
+                continue
+            if adjacent:
+                redundancy = 1.0
+            score = RAG_MMR_LAMBDA * (row["score"] or 0.0) - (1 - RAG_MMR_LAMBDA) * redundancy
+            if score > best_score:
+                best, best_score = row, score
+        if best is None:
+            break
+        if any(_is_adjacent(positions[best["id"]], positions[chosen["id"]]) for chosen in selected):
+            _mmr_stats["penalized_adjacent"] += 1
+        selected.append(best)
+        candidates.remove(best)
+    _mmr_stats["candidates"] += len(rows)
+    _mmr_stats["returned"] += len(selected)
+    return selected
+
+
+def _search(queries: list[str], embeddings: np.ndarray, n_results: list[int], source_filter: str | None,
+            mode: str | None) -> list[list[dict]]:
+    """
+    Top n_results[i] rows for each query in the requested search mode,
+    reranked by MMR. The queries are searched together at the deepest
+    depth; each is reranked over its own n_results * RAG_MMR_POOL rows.
+    """
+    pool = RAG_MMR_POOL if RAG_MMR else 1
+    ranked = _ranked(queries, embeddings, max(n_results) * pool, source_filter, mode)
+    ranked = [rows[:n * pool] for rows, n in zip(ranked, n_results)]
+    if not RAG_MMR:
+        return ranked
+    vectors = _chunk_embeddings(list(dict.fromkeys(r["id"] for rows in ranked for r in rows)))
+    return [_mmr(rows, vectors, n) for rows, n in zip(ranked, n_results)]
+
+
+def mmr_stats() -> dict:
+    return {"enabled": RAG_MMR, **_mmr_stats}
+
+
 def search_protocols(
     query: str,
     n_results: int = 3,
     source_filter: str | None = None,
+    mode: str | None = None,
 ) -> list[dict]:
     """
     Search dementia care guidelines for relevant protocol steps.
@@ -38,35 +501,42 @@ def search_protocols(
         query: Natural language description of the behavioral event
         n_results: Number of results to return
         source_filter: Optional filter by source (CMS, NICE, APA, Alzheimer's Association)
+        mode: "vector" or "hybrid" (default: RAG_SEARCH_MODE)
     
     Returns:
-        List of {text, source, title, page, score} dicts
+        Up to n_results {id, text, source, title, page, score} dicts, fewer
+        when redundant chunks are dropped (see RAG_MMR). score is the
+        cosine similarity in vector mode and the fused rank score (0-1) in
+        hybrid mode.
     """
-    collection = _get_collection()
-    
-    where_filter = None
-    if source_filter:
-        where_filter = {"source": source_filter}
-    
-    results = collection.query(
-        query_texts=[query],
-        n_results=n_results,
-        where=where_filter,
-    )
-    
-    output = []
-    for i in range(len(results["documents"][0])):
-        meta = results["metadatas"][0][i]
-        distance = results["distances"][0][i] if results.get("distances") else None
-        output.append({
-            "text": results["documents"][0][i],
-            "source": meta.get("source", "Unknown"),
-            "title": meta.get("title", "Unknown"),
-            "page": meta.get("page", 0),
-            "filename": meta.get("filename", ""),
-            "score": round(1 - distance, 4) if distance is not None else None,
-        })
-    
+    return _search([query], embed_queries([query]), [n_results], source_filter, mode)[0]
+
+
+def search_protocols_batch(queries: list[dict]) -> list[list[dict]]:
+    """
+    Search many queries at once: one batched embedding pass, then one
+    vectorized search per distinct (source_filter, mode).
+
+    Args:
+        queries: [{query, n_results (default 3), source_filter, mode (optional)}]
+
+    Returns:
+        One search_protocols-style result list per query, in order
+    """
+    if not queries:
+        return []
+    embeddings = embed_queries([q["query"] for q in queries])
+
+    groups: dict[tuple, list[int]] = {}
+    for i, q in enumerate(queries):
+        groups.setdefault((q.get("source_filter") or None, q.get("mode")), []).append(i)
+
+    output: list[list[dict]] = [[] for _ in queries]
+    for (source_filter, mode), members in groups.items():
+        n_results = [queries[i].get("n_results", 3) for i in members]
+        texts = [queries[i]["query"] for i in members]
+        for i, rows in zip(members, _search(texts, embeddings[members], n_results, source_filter, mode)):
+            output[i] = rows
     return output
 
 
@@ -94,6 +564,7 @@ def format_protocol_for_display(results: list[dict]) -> list[dict]:
             summary_text += "..."
         
         formatted.append({
+            "id": r.get("id"),
             "source": r.get("source", "Unknown"),
             "title": r.get("title", "Unknown"),
             "page": r.get("page", 0),
@@ -106,24 +577,72 @@ def format_protocol_for_display(results: list[dict]) -> list[dict]:
     return formatted
 
 
+def _event_type_query(event_type: str) -> str:
+    return EVENT_TYPE_QUERIES.get(event_type.lower(), f"{event_type} dementia care management")
+
+
 def search_by_event_type(event_type: str, n_results: int = 3) -> list[dict]:
     """
     Search protocols by behavioral event type.
     Maps common event types to optimized search queries.
+
+    Results for up to PRECOMPUTE_N_RESULTS are served from the in-memory
+    event-type table, so the event-report path does no vector search.
     """
-    query_map = {
-        "agitation": "managing agitation aggressive behavior dementia non-pharmacological intervention",
-        "sundowning": "sundowning late afternoon evening confusion dementia management strategies",
-        "wandering": "wandering elopement prevention dementia patient safety environmental modification",
-        "refusal": "medication refusal food refusal dementia patient care strategies compliance",
-        "fall": "fall prevention dementia patient safety assessment risk factors intervention",
-        "aggression": "aggressive behavior dementia de-escalation techniques non-pharmacological management",
-        "confusion": "acute confusion delirium dementia assessment differential diagnosis management",
-        "sleep_disturbance": "sleep disturbance insomnia dementia non-pharmacological sleep hygiene",
+    if n_results > PRECOMPUTE_N_RESULTS:
+        return search_protocols(_event_type_query(event_type), n_results=n_results)
+
+    global _event_type_table
+    _check_reingested()
+    stamp, table = _pointer_stamp, _event_type_table  # fills and refreshes replace the table, never mutate it
+    key = event_type.lower()
+    rows = table.get(key)
+    if rows is None:
+        rows = search_protocols(_event_type_query(event_type), n_results=PRECOMPUTE_N_RESULTS)
+        # Only the closed set is kept; any other event_type string is served uncached
+        if key in EVENT_TYPES:
+            with _swap_lock:
+                if _pointer_stamp == stamp:  # rows are from the collection still being served
+                    _event_type_table = {**_event_type_table, key: rows}
+    return [dict(r) for r in rows[:n_results]]
+
+
+def matches_event_type(results: list[dict], event_type: str, min_fraction: float = 0.5) -> bool:
+    """True if at least `min_fraction` of the results mention the event type's keywords."""
+    keywords = EVENT_TYPE_KEYWORDS.get(event_type.lower())
+    if not keywords or not results:
+        return bool(results)
+    hits = sum(1 for r in results if any(kw in r.get("text", "").lower() for kw in keywords))
+    return hits >= min_fraction * len(results)
+
+
+def _compute_event_type_table() -> dict[str, list[dict]]:
+    return {
+        event_type: search_protocols(_event_type_query(event_type), n_results=PRECOMPUTE_N_RESULTS)
+        for event_type in EVENT_TYPES
     }
-    
-    search_query = query_map.get(event_type.lower(), f"{event_type} dementia care management")
-    return search_protocols(search_query, n_results=n_results)
+
+
+def warm_event_type_table():
+    """Precompute top-k protocols for every event type (call at startup)."""
+    for event_type in EVENT_TYPES:
+        search_by_event_type(event_type)
+    logger.info(f"RAG: precomputed protocols for {len(EVENT_TYPES)} event types")
+
+
+def warm_up():
+    """
+    Load everything the first search would otherwise pay for: the active
+    collection, the embedding model, the indexes the configured backend and
+    search mode use, and the event-type table.
+    """
+    _get_collection()
+    embed_texts(["warm-up"])  # the event-type queries may all be cache hits, so load the model explicitly
+    if RAG_BACKEND == "numpy":
+        _get_vector_index()
+    if RAG_SEARCH_MODE == "hybrid":
+        _get_lexical_index()
+    warm_event_type_table()
 
 
 if __name__ == "__main__":
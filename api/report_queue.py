@@ -0,0 +1,249 @@
+"""
+Report Queue — durable background processing for event reports.
+
+Reports sent to /api/events/report/async are persisted right away as a
+BehavioralEvent plus a ReportJob row in the app database. A small pool of
+in-process asyncio workers claims queued jobs, runs transcription and the
+event pipeline, and writes the results back. Because the queue lives in the
+database, jobs survive restarts and can be claimed by any API process.
+
+Set via environment variables:
+  REPORT_WORKERS=2              (workers per API process)
+  REPORT_JOB_MAX_ATTEMPTS=3     (a job is marked failed after this many tries)
+  REPORT_JOB_STALE_SECONDS=300  (running jobs untouched this long are re-queued at startup)
+  REPORT_JOB_RETRY_SECONDS=30   (a re-queued job waits this long before it is claimed again)
+"""
+
+import os
+import asyncio
+import logging
+from datetime import timedelta
+
+from sqlalchemy import or_, update
+
+from models import SessionLocal, ReportJob, utcnow
+from schemas_v2 import EventJobOut
+import llm_service
+import event_pipeline
+
+logger = logging.getLogger(__name__)
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_JOB_MAX_ATTEMPTS = int(os.getenv("REPORT_JOB_MAX_ATTEMPTS", "3"))
+REPORT_JOB_STALE_SECONDS = int(os.getenv("REPORT_JOB_STALE_SECONDS", "300"))
+REPORT_JOB_RETRY_SECONDS = int(os.getenv("REPORT_JOB_RETRY_SECONDS", "30"))
+POLL_INTERVAL = 2.0  # seconds; also picks up jobs enqueued by other processes
+
+PROGRESS_STAGES = ("transcribing", "parsing", "retrieving", "summarizing")
+FINAL_STATUSES = ("done", "failed")
+
+_ready: asyncio.Queue | None = None
+_workers: list[asyncio.Task] = []
+_subscribers: dict[int, set[asyncio.Queue]] = {}
+
+
+def job_snapshot(job: ReportJob) -> dict:
+    return EventJobOut.model_validate(job).model_dump(mode="json")
+
+
+def notify(job_id: int):
+    """Wake a worker for a newly enqueued job."""
+    if _ready is not None:
+        _ready.put_nowait(job_id)
+
+
+def _notify_after_backoff(job_id: int):
+    """Wake a worker once a re-queued job may be claimed again."""
+    asyncio.get_running_loop().call_later(REPORT_JOB_RETRY_SECONDS, notify, job_id)
+
+
+def _publish(job: ReportJob):
+    snapshot = job_snapshot(job)
+    for q in _subscribers.get(job.id, ()):
+        q.put_nowait(snapshot)
+
+
+def _claim_next() -> int | None:
+    """Atomically move the oldest claimable queued job to 'running' and return its id."""
+    db = SessionLocal()
+    try:
+        while True:
+            # Jobs that already failed an attempt wait out the retry backoff
+            retry_after = utcnow() - timedelta(seconds=REPORT_JOB_RETRY_SECONDS)
+            row = (
+                db.query(ReportJob.id)
+                .filter(
+                    ReportJob.status == "queued",
+                    or_(ReportJob.attempts == 0, ReportJob.updated_at <= retry_after),
+                )
+                .order_by(ReportJob.id)
+                .first()
+            )
+            if row is None:
+                return None
+            claimed = db.execute(
+                update(ReportJob)
+                .where(ReportJob.id == row.id, ReportJob.status == "queued")
+                .values(status="running", attempts=ReportJob.attempts + 1, updated_at=utcnow())
+            ).rowcount
+            db.commit()
+            if claimed:
+                return row.id
+    finally:
+        db.close()
+
+
+async def _process(job_id: int):
+    db = SessionLocal()
+    try:
+        job = db.get(ReportJob, job_id)
+        event = job.event
+
+        async def on_stage(stage: str, **data):
+            if stage in PROGRESS_STAGES:
+                job.stage = stage
+                db.commit()
+                _publish(job)
+
+        try:
+            transcription = None
+            description = job.text
+            if job.audio:
+                await on_stage("transcribing")
+                transcription = await llm_service.transcribe_audio(job.audio, job.audio_filename or "audio.wav")
+                description = transcription
+                event.description = transcription
+
+            result = await event_pipeline.run_pipeline(description, on_stage=on_stage)
+            event_pipeline.apply_to_event(event, result)
+            job.result = event_pipeline.build_response(event.id, result, transcription).model_dump(mode="json")
+            job.status = "done"
+            job.stage = "done"
+            job.error = None
+            job.audio = None
+        except asyncio.CancelledError:
+            job.status = "queued"
+            db.commit()
+            raise
+        except Exception as e:
+            logger.exception(f"Report job {job_id} failed (attempt {job.attempts})")
+            job.error = str(e) or type(e).__name__
+            job.status = "queued" if job.attempts < REPORT_JOB_MAX_ATTEMPTS else "failed"
+
+        db.commit()
+        _publish(job)
+        if job.status == "queued":
+            _notify_after_backoff(job.id)
+    finally:
+        db.close()
+
+
+def _release(job_id: int, error: Exception):
+    """Hand back a job whose processing crashed outside _process's own error handling."""
+    db = SessionLocal()
+    try:
+        job = db.get(ReportJob, job_id)
+        if job is None or job.status != "running":
+            return
+        job.error = str(error) or type(error).__name__
+        job.status = "queued" if (job.attempts or 0) < REPORT_JOB_MAX_ATTEMPTS else "failed"
+        db.commit()
+        _publish(job)
+        if job.status == "queued":
+            _notify_after_backoff(job.id)
+    finally:
+        db.close()
+
+
+async def _worker_loop():
+    while True:
+        try:
+            job_id = _claim_next()
+            if job_id is not None:
+                try:
+                    await _process(job_id)
+                except Exception as e:
+                    logger.exception(f"Report job {job_id} crashed; releasing it")
+                    _release(job_id, e)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # A worker must outlive any single job or database hiccup
+            logger.exception("Report queue worker error")
+            await asyncio.sleep(POLL_INTERVAL)
+            continue
+        try:
+            await asyncio.wait_for(_ready.get(), timeout=POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _requeue_stale_jobs():
+    """Re-queue jobs left 'running' by a process that died mid-job."""
+    cutoff = utcnow() - timedelta(seconds=REPORT_JOB_STALE_SECONDS)
+    db = SessionLocal()
+    try:
+        requeued = db.execute(
+            update(ReportJob)
+            .where(ReportJob.status == "running", ReportJob.updated_at < cutoff)
+            .values(status="queued")
+        ).rowcount
+        db.commit()
+        if requeued:
+            logger.info(f"Report queue: re-queued {requeued} stale job(s)")
+    finally:
+        db.close()
+
+
+async def start_workers():
+    global _ready
+    if _workers:
+        return
+    _ready = asyncio.Queue()
+    _requeue_stale_jobs()
+    for _ in range(REPORT_WORKERS):
+        _workers.append(asyncio.create_task(_worker_loop()))
+    logger.info(f"Report queue: started {REPORT_WORKERS} worker(s)")
+
+
+async def stop_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+def get_job(job_id: int) -> dict | None:
+    db = SessionLocal()
+    try:
+        job = db.get(ReportJob, job_id)
+        return job_snapshot(job) if job else None
+    finally:
+        db.close()
+
+
+async def subscribe(job_id: int):
+    """Yield job snapshots as the job progresses, ending at done/failed."""
+    q = asyncio.Queue()
+    _subscribers.setdefault(job_id, set()).add(q)
+    try:
+        last = get_job(job_id)
+        if last is None:
+            return
+        yield last
+        while last["status"] not in FINAL_STATUSES:
+            try:
+                snapshot = await asyncio.wait_for(q.get(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                # The job may be running in another process; fall back to polling
+                snapshot = get_job(job_id)
+            if (snapshot["status"], snapshot["stage"]) != (last["status"], last["stage"]):
+                yield snapshot
+            last = snapshot
+    finally:
+        subs = _subscribers.get(job_id)
+        if subs is not None:
+            subs.discard(q)
+            if not subs:
+                del _subscribers[job_id]
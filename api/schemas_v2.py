@@ -37,6 +37,33 @@ class EventReportResponse(BaseModel):
     protocols: list[ProtocolStep]
     transcription: Optional[str] = None
 
+class EventJobOut(BaseModel):
+    id: int
+    event_id: int
+    status: str  # queued, running, done, failed
+    stage: str
+    result: Optional[EventReportResponse] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class BatchReportItem(BaseModel):
+    patient_id: int
+    reporter_id: int
+    text: str
+    shift: Optional[str] = None  # defaults to the current shift
+    event_at: Optional[datetime] = None
+
+class BatchReportRequest(BaseModel):
+    reports: list[BatchReportItem]
+
+class BatchReportResponse(BaseModel):
+    results: list[EventReportResponse]  # same order as the request
+
 class InterventionRequest(BaseModel):
     text: Optional[str] = None
 
@@ -0,0 +1,149 @@
+"""
+Vector Index — exact in-memory cosine search over the knowledge base.
+
+The guideline collection is small (~2,300 chunks), so a brute-force scan is
+both exact and faster than Chroma's SQLite + HNSW query path: all chunk
+embeddings live in one contiguous, L2-normalized float32 matrix and a query
+is a single matrix-vector product followed by a partial sort. Source filters
+are precomputed boolean masks.
+
+The matrix and chunk metadata are built from the Chroma collection and saved
+next to it, one directory per collection version, so later processes load
+them (memory-mapped by default) without touching Chroma. Processes serving
+different versions during an ingest never overwrite each other's index, and
+ingest prunes the directories of versions it drops.
+
+Set via environment variables:
+  RAG_BACKEND=numpy          (read by rag_service; default: chroma)
+  RAG_INDEX_DIR=...          (default: knowledge_base/vector_index/<collection>/)
+  RAG_INDEX_MMAP=1           (memory-map the saved matrix; default: 1)
+"""
+
+import os
+import json
+import shutil
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RAG_INDEX_DIR = os.getenv(
+    "RAG_INDEX_DIR", os.path.join(os.path.dirname(__file__), "knowledge_base", "vector_index")
+)
+RAG_INDEX_MMAP = os.getenv("RAG_INDEX_MMAP", "1") not in ("0", "false", "False")
+
+MATRIX_FILE = "embeddings.npy"
+META_FILE = "chunks.json"
+_GET_BATCH = 1000  # rows per collection.get() page
+
+
+def index_dir(collection: str, root: str = RAG_INDEX_DIR) -> str:
+    """Where the index of `collection` is saved."""
+    return os.path.join(root, collection)
+
+
+def prune_saved(keep: set[str], root: str = RAG_INDEX_DIR):
+    """Delete saved indexes of collections other than `keep`, and any pre-versioned one."""
+    if not os.path.isdir(root):
+        return
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and name not in keep and os.path.exists(os.path.join(path, META_FILE)):
+            shutil.rmtree(path)
+        elif name in (MATRIX_FILE, META_FILE):
+            os.remove(path)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class VectorIndex:
+    """Normalized embedding matrix plus the ids, documents and metadata of each row."""
+
+    def __init__(self, ids: list[str], documents: list[str], metadatas: list[dict],
+                 matrix: np.ndarray, stamp=None):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.matrix = matrix
+        self.stamp = stamp
+        self.row_of = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        self.source_masks = self._build_masks("source")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _build_masks(self, field: str) -> dict[str, np.ndarray]:
+        values = np.array([m.get(field, "") for m in self.metadatas], dtype=object)
+        return {v: values == v for v in set(values.tolist())}
+
+    @classmethod
+    def from_collection(cls, collection, stamp=None) -> "VectorIndex":
+        """Copy every chunk and its stored embedding out of a Chroma collection."""
+        ids, documents, metadatas, embeddings = [], [], [], []
+        total = collection.count()
+        for offset in range(0, total, _GET_BATCH):
+            page = collection.get(
+                limit=_GET_BATCH, offset=offset, include=["embeddings", "documents", "metadatas"],
+            )
+            ids.extend(page["ids"])
+            documents.extend(page["documents"])
+            metadatas.extend(page["metadatas"])
+            embeddings.extend(page["embeddings"])
+        matrix = normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        return cls(ids, documents, metadatas, np.ascontiguousarray(matrix), stamp)
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        # Write to temp names and rename, so a concurrent load never sees half a file
+        np.save(os.path.join(path, MATRIX_FILE + ".tmp.npy"), self.matrix)
+        with open(os.path.join(path, META_FILE + ".tmp"), "w") as f:
+            json.dump({"stamp": self.stamp, "ids": self.ids,
+                       "documents": self.documents, "metadatas": self.metadatas}, f)
+        os.replace(os.path.join(path, MATRIX_FILE + ".tmp.npy"), os.path.join(path, MATRIX_FILE))
+        os.replace(os.path.join(path, META_FILE + ".tmp"), os.path.join(path, META_FILE))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = RAG_INDEX_MMAP) -> "VectorIndex | None":
+        """Load a saved index, or None if there is none."""
+        try:
+            with open(os.path.join(path, META_FILE)) as f:
+                meta = json.load(f)
+            matrix = np.load(os.path.join(path, MATRIX_FILE), mmap_mode="r" if mmap else None)
+        except FileNotFoundError:
+            return None
+        if matrix.shape[0] != len(meta["ids"]):
+            logger.warning(f"Vector index at {path} is inconsistent, ignoring it")
+            return None
+        return cls(meta["ids"], meta["documents"], meta["metadatas"], matrix, meta.get("stamp"))
+
+    def search(self, query_embeddings: np.ndarray, n_results: int,
+               source_filter: str | None = None) -> list[list[tuple[int, float]]]:
+        """
+        Exact cosine top-k for each query row.
+        Returns one [(row, similarity), ...] list per query, best first.
+        """
+        queries = normalize(np.atleast_2d(query_embeddings))
+        scores = queries @ self.matrix.T  # (q, n)
+        if source_filter is not None:
+            mask = self.source_masks.get(source_filter)
+            if mask is None:
+                return [[] for _ in range(len(queries))]
+            scores[:, ~mask] = -np.inf
+            available = int(mask.sum())
+        else:
+            available = len(self)
+
+        k = min(n_results, available)
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for q, rows in enumerate(top):
+            rows = rows[np.argsort(-scores[q, rows])]
+            results.append([(int(r), float(scores[q, r])) for r in rows])
+        return results
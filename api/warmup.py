@@ -0,0 +1,112 @@
+"""
+Warm-up — load what the first request would otherwise pay for.
+
+Runs once per worker, in the background right after startup:
+  rag         open the active collection, load the embedding model and the
+              configured indexes, precompute the event-type protocol table
+  classifier  embed the labelled events for the kNN stage
+  llm         create the shared client and open a pooled provider connection
+
+The local steps run one after another in a thread (they share the embedding
+model); the LLM step overlaps them on the event loop.
+
+/api/ready answers 503 until warm-up has finished and every required step
+succeeded, so a load balancer only routes to warm workers. /api/health stays
+a plain liveness check. A failed optional step only means the first request
+that needs it loads it lazily, as it would without warm-up.
+
+Set via environment variables:
+  WARMUP=1        (default: 1, set 0 to report ready immediately)
+  WARMUP_LLM=1    (open a provider connection during warm-up; default: 1)
+"""
+
+import os
+import time
+import asyncio
+import logging
+
+import llm_service
+import rag_service
+import event_classifier
+
+logger = logging.getLogger(__name__)
+
+WARMUP = os.getenv("WARMUP", "1") not in ("0", "false", "False")
+WARMUP_LLM = os.getenv("WARMUP_LLM", "1") not in ("0", "false", "False")
+
+# (name, function, required for readiness)
+LOCAL_STEPS = [
+    ("rag", rag_service.warm_up, True),
+    ("classifier", event_classifier.warm_up, False),
+]
+LLM_STEP = ("llm", llm_service.warm_up, False)
+
+_task: asyncio.Task | None = None
+_state = {"status": "pending", "started_at": None, "seconds": None, "steps": {}}
+
+
+async def _run_step(name: str, step, required: bool):
+    _state["steps"][name] = {"status": "running", "required": required}
+    started = time.perf_counter()
+    try:
+        if asyncio.iscoroutinefunction(step):
+            await step()
+        else:
+            await asyncio.to_thread(step)
+        result = {"status": "ok"}
+    except Exception as e:
+        logger.warning(f"Warm-up step '{name}' failed: {e}")
+        result = {"status": "failed", "error": str(e)}
+    result.update(required=required, seconds=round(time.perf_counter() - started, 3))
+    _state["steps"][name] = result
+
+
+async def _run_local_steps():
+    for name, step, required in LOCAL_STEPS:
+        await _run_step(name, step, required)
+
+
+async def run():
+    """Run every warm-up step and record the outcome for /api/ready."""
+    _state["status"] = "warming"
+    _state["started_at"] = time.time()
+    started = time.perf_counter()
+    jobs = [_run_local_steps()]
+    if WARMUP_LLM:
+        jobs.append(_run_step(*LLM_STEP))
+    await asyncio.gather(*jobs)
+
+    failed = [name for name, step in _state["steps"].items() if step["required"] and step["status"] != "ok"]
+    _state["status"] = "failed" if failed else "ready"
+    _state["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Warm-up {_state['status']} in {_state['seconds']}s")
+
+
+def start():
+    """Schedule warm-up on the running event loop (call from a startup handler)."""
+    global _task
+    if not WARMUP:
+        _state["status"] = "ready"
+        return
+    if _task is None:
+        _task = asyncio.create_task(run())
+
+
+async def stop():
+    """Cancel a warm-up that is still running (call on shutdown)."""
+    global _task
+    if _task is not None and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
+
+
+def is_ready() -> bool:
+    return _state["status"] == "ready"
+
+
+def status() -> dict:
+    return {"ready": is_ready(), **_state, "steps": dict(_state["steps"])}
@@ -216,10 +216,7 @@ async def run_shift(
             if event is None:
                 continue
 
-            # Throttle API calls to avoid upstream rate limits (Groq etc.)
-            if total_events > 0:
-                await asyncio.sleep(3)  # 3s between events
-
+            # No client-side throttle: the API queues LLM calls under the provider's limits
             total_events += 1
             behavior = event["behavior"]
             patient_name = event["patient_name"]
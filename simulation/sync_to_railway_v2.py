@@ -1,5 +1,5 @@
 """
-Sync local simulation results to Railway — v2 with retry + throttle.
+Sync local simulation results to Railway — v2 with retry.
 Only syncs events not already on Railway (incremental).
 """
 import sqlite3
@@ -9,8 +9,9 @@ import json
 
 LOCAL_DB = "/home/guilinzhang/allProjects/memowell-ai/api/memowell.db"
 RAILWAY_URL = "https://memowell-ai-production.up.railway.app"
-THROTTLE = 2.5  # seconds between requests (stay under 30 RPM Groq limit)
+THROTTLE = 2.5  # base retry back-off in seconds (the API itself queues calls under Groq limits)
 MAX_RETRIES = 3
+BATCH_SIZE = 50  # reports per /api/events/report/batch call
 
 
 async def sync():
@@ -18,7 +19,7 @@ async def sync():
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
 
-    async with httpx.AsyncClient(base_url=RAILWAY_URL, timeout=60.0) as client:
+    async with httpx.AsyncClient(base_url=RAILWAY_URL, timeout=300.0) as client:
         # Check how many events Railway already has
         r = await client.get("/api/patients")
         patients = r.json()
@@ -58,56 +59,56 @@ async def sync():
         synced = 0
         errors = 0
 
-        for ev in events_to_sync:
-            patient_name = local_patients.get(ev["patient_id"], "")
-            railway_pid = patient_map.get(patient_name, ev["patient_id"])
-
+        for start in range(0, len(events_to_sync), BATCH_SIZE):
+            batch = events_to_sync[start:start + BATCH_SIZE]
+            reports = [
+                {
+                    "patient_id": patient_map.get(local_patients.get(ev["patient_id"], ""), ev["patient_id"]),
+                    "reporter_id": 1,
+                    "text": ev["description"] or "No description",
+                }
+                for ev in batch
+            ]
+
+            results = None
             for attempt in range(MAX_RETRIES):
                 try:
-                    r = await client.post("/api/events/report", data={
-                        "patient_id": railway_pid,
-                        "reporter_id": 1,
-                        "text": ev["description"] or "No description",
-                    })
-
+                    r = await client.post("/api/events/report/batch", json={"reports": reports})
                     if r.status_code == 200:
-                        result = r.json()
-                        event_id = result.get("event_id")
-
-                        if ev["intervention_description"] and event_id:
-                            await client.post(f"/api/events/{event_id}/intervention", json={
-                                "description": ev["intervention_description"],
-                            })
-
-                        if ev["outcome_description"] and event_id:
-                            await client.post(f"/api/events/{event_id}/outcome", json={
-                                "description": ev["outcome_description"],
-                                "resolved": bool(ev["resolved"]),
-                            })
-
-                        synced += 1
+                        results = r.json()["results"]
                         break
-                    elif r.status_code in (429, 500, 502, 503):
+                    elif r.status_code in (429, 502, 503, 504):  # a 500 may have stored the batch
                         wait = THROTTLE * (attempt + 2)
                         print(f"  ⚠️ {r.status_code}, retry {attempt+1}, wait {wait}s...")
                         await asyncio.sleep(wait)
                     else:
-                        errors += 1
-                        if errors <= 5:
-                            print(f"  ❌ Event {ev['id']}: {r.status_code}")
+                        print(f"  ❌ Batch at event {batch[0]['id']}: {r.status_code} {r.text[:200]}")
                         break
                 except Exception as e:
                     if attempt < MAX_RETRIES - 1:
                         await asyncio.sleep(THROTTLE * 2)
                     else:
-                        errors += 1
-                        if errors <= 5:
-                            print(f"  ❌ Event {ev['id']}: {e}")
+                        print(f"  ❌ Batch at event {batch[0]['id']}: {e}")
+
+            if results is None:
+                errors += len(batch)
+                continue
 
-            if synced % 10 == 0 and synced > 0:
-                print(f"  ... {synced}/{len(events_to_sync)} synced")
+            for ev, result in zip(batch, results):
+                event_id = result.get("event_id")
+                if ev["intervention_description"] and event_id:
+                    await client.post(f"/api/events/{event_id}/intervention", data={
+                        "text": ev["intervention_description"],
+                    })
+
+                if ev["outcome_description"] and event_id:
+                    await client.post(f"/api/events/{event_id}/outcome", data={
+                        "text": ev["outcome_description"],
+                        "resolved": bool(ev["resolved"]),
+                    })
 
-            await asyncio.sleep(THROTTLE)
+            synced += len(results)
+            print(f"  ... {synced}/{len(events_to_sync)} synced")
 
         print(f"\n✅ Synced: {synced}/{len(events_to_sync)} ({errors} errors)")
 